@@ -2,6 +2,8 @@
 ASGI config for bingo_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests to the Server-Sent Events endpoint are handled directly by
+``game.events``; everything else goes through Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +15,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bingo_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from game.events import event_stream, events_game_slug  # noqa: E402  (needs apps loaded)
+
+
+async def application(scope, receive, send):
+    slug = events_game_slug(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+    if slug is not None:
+        await event_stream(scope, receive, send, slug)
+    else:
+        await django_application(scope, receive, send)
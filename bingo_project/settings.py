@@ -1,7 +1,9 @@
+import hashlib
 import os
 from pathlib import Path
 
 import dj_database_url
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -31,6 +33,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "game.metrics.MetricsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -67,6 +70,16 @@ DATABASES = {
     )
 }
 
+# Optional read replica; the read-only API views send their queries to it
+REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+if REPLICA_DATABASE_URL:
+    DATABASES["replica"] = dj_database_url.parse(REPLICA_DATABASE_URL)
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+DATABASE_ROUTERS = ["game.routers.ReplicaRouter"]
+
+# Seconds a player's reads stay on the primary after they write, to cover replica lag
+REPLICA_PIN_SECONDS = float(os.environ.get("REPLICA_PIN_SECONDS", "5"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -98,6 +111,9 @@ CORS_ALLOWED_ORIGINS = os.environ.get(
     "CORS_ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173,http://127.0.0.1:5500,http://localhost:8080"
 ).split(",")
 CORS_ALLOW_ALL_ORIGINS = DEBUG
+# Conditional GETs and retried scans from the API client
+CORS_ALLOW_HEADERS = (*default_headers, "if-none-match", "idempotency-key")
+CORS_EXPOSE_HEADERS = ["ETag"]
 
 # Media files serving in production via WhiteNoise
 WHITENOISE_ALLOW_ALL_ORIGINS = True
@@ -108,8 +124,89 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "game.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # ?format= picks a view's wire format (e.g. the compact board), not a renderer
+    "URL_FORMAT_OVERRIDE": None,
 }
 
 # Media files (QR codes)
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+# Caches — file-based so all gunicorn workers on an instance share them. Each
+# concern gets its own alias, so one busy kind of entry can't cull the others.
+# Entries derived from the database are keyed by it, so switching DATABASE_URL
+# never serves another database's rows.
+CACHE_DIR = Path(os.environ.get("CACHE_DIR", BASE_DIR / ".cache"))
+DATABASE_CACHE_PREFIX = hashlib.sha256(
+    repr([DATABASES["default"].get(part) for part in ("ENGINE", "NAME", "HOST", "PORT")]).encode()
+).hexdigest()[:8]
+CACHES = {
+    # Game state and the task catalog version
+    "default": {
+        "BACKEND": "game.cache_backends.FileBasedCache",
+        "LOCATION": str(CACHE_DIR / "default"),
+        "KEY_PREFIX": DATABASE_CACHE_PREFIX,
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+    "leaderboard": {
+        "BACKEND": "game.cache_backends.FileBasedCache",
+        "LOCATION": str(CACHE_DIR / "leaderboard"),
+        "KEY_PREFIX": DATABASE_CACHE_PREFIX,
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+    # One entry per player who wrote in the last REPLICA_PIN_SECONDS. Every
+    # scan sets one and each set lists the directory, so keep it small;
+    # expired pins are culled first
+    "replica-pins": {
+        "BACKEND": "game.cache_backends.FileBasedCache",
+        "LOCATION": str(CACHE_DIR / "replica-pins"),
+        "KEY_PREFIX": DATABASE_CACHE_PREFIX,
+        "OPTIONS": {"MAX_ENTRIES": 2000},
+    },
+    # One entry per player, kept for good: bounded by the player count, so
+    # never culled and its sets never list the directory
+    "qr": {
+        "BACKEND": "game.cache_backends.FileBasedCache",
+        "LOCATION": os.environ.get("QR_CACHE_DIR", str(CACHE_DIR / "qr")),
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": None},
+    },
+}
+LEADERBOARD_CACHE_ALIAS = "leaderboard"
+REPLICA_PIN_CACHE_ALIAS = "replica-pins"
+QR_CACHE_ALIAS = "qr"
+QR_MEMORY_CACHE_SIZE = int(os.environ.get("QR_MEMORY_CACHE_SIZE", "512"))
+
+# Serve the board, game-state, winners and scan endpoints with async views;
+# turn off to use the sync DRF views, e.g. under a WSGI server
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "True").lower() in ("true", "1", "yes")
+
+# Seconds a worker may serve its own copy of GameState before re-checking the shared cache
+GAME_STATE_CACHE_TTL = float(os.environ.get("GAME_STATE_CACHE_TTL", "2"))
+
+# Seconds a cached leaderboard is served before one worker rebuilds it
+LEADERBOARD_CACHE_TTL = float(os.environ.get("LEADERBOARD_CACHE_TTL", "3"))
+LEADERBOARD_MAX_SIZE = 100
+
+# Seconds the response to a scan sent with an Idempotency-Key is kept for retries
+IDEMPOTENCY_KEY_TTL = float(os.environ.get("IDEMPOTENCY_KEY_TTL", "3600"))
+
+# "sync" saves each scan within its request; "queued" acknowledges a scan once it
+# is in a local journal that a background writer flushes to the database in batches
+SCAN_INGESTION = os.environ.get("SCAN_INGESTION", "sync")
+SCAN_QUEUE_PATH = os.environ.get("SCAN_QUEUE_PATH", str(CACHE_DIR / "scan-queue.sqlite3"))
+SCAN_QUEUE_BATCH_SIZE = int(os.environ.get("SCAN_QUEUE_BATCH_SIZE", "500"))
+SCAN_QUEUE_FLUSH_INTERVAL = float(os.environ.get("SCAN_QUEUE_FLUSH_INTERVAL", "0.2"))
+# Turn off when a separate `manage.py flush_scan_queue --follow` process does the writing
+SCAN_QUEUE_WRITER_THREAD = os.environ.get("SCAN_QUEUE_WRITER_THREAD", "True").lower() in ("true", "1", "yes")
+
+# Seconds between the shared game-state checks behind the /api/events/ stream
+EVENTS_POLL_INTERVAL = float(os.environ.get("EVENTS_POLL_INTERVAL", "2"))
+
+# Request metrics exposed at /api/metrics/
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_SLOW_REQUEST_MS = float(os.environ.get("METRICS_SLOW_REQUEST_MS", "500"))
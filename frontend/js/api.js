@@ -5,15 +5,45 @@
 const API = (() => {
   // Change this to your Render backend URL in production
   const BASE = window.BINGO_API_BASE || "http://localhost:8000/api";
+  // Set window.BINGO_GAME to a game slug to play a game other than the default
+  const GAME_BASE = window.BINGO_GAME
+    ? `${BASE}/games/${encodeURIComponent(window.BINGO_GAME)}`
+    : BASE;
 
-  async function request(path, options = {}) {
-    const url = `${BASE}${path}`;
+  // Last ETag and body per GET url, for conditional requests
+  const etagCache = new Map();
+
+  // Retries of a scan lost to a network error, each resent with the same key
+  const SCAN_RETRIES = 2;
+
+  function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+      return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+  }
+
+  async function request(path, { headers = {}, ...options } = {}) {
+    const url = `${GAME_BASE}${path}`;
+    const isGet = !options.method || options.method === "GET";
+    const cached = isGet ? etagCache.get(url) : null;
     const config = {
-      headers: { "Content-Type": "application/json" },
+      headers: {
+        "Content-Type": "application/json",
+        ...(cached ? { "If-None-Match": cached.etag } : {}),
+        ...headers,
+      },
       ...options,
     };
     const res = await fetch(url, config);
+    if (res.status === 304 && cached) {
+      return cached.data;
+    }
     const data = await res.json();
+    const etag = res.headers.get("ETag");
+    if (isGet && res.ok && etag) {
+      etagCache.set(url, { etag, data });
+    }
     if (!res.ok) {
       const err = new Error(data.error || `Request failed (${res.status})`);
       err.status = res.status;
@@ -35,18 +65,65 @@ const API = (() => {
       return request(`/player/${playerId}/`);
     },
 
-    getBoard(playerId) {
-      return request(`/board/${playerId}/`);
+    getBootstrap(playerId, { qr = false } = {}) {
+      return request(`/player/${playerId}/bootstrap/${qr ? "?qr=1" : ""}`);
+    },
+
+    async getBoard(playerId) {
+      // The compact board plus the task list (usually a 304) make the full cells
+      const [board, tasks] = await Promise.all([
+        request(`/board/${playerId}/?format=compact`),
+        request("/tasks/"),
+      ]);
+      const descriptions = new Map(tasks.map((task) => [task.id, task.description]));
+      const cells = [];
+      board.tasks.forEach((taskId, position) => {
+        if (taskId !== null) {
+          cells.push({
+            task_id: taskId,
+            description: descriptions.get(taskId),
+            position,
+            completed: Boolean((board.mask >> position) & 1),
+          });
+        }
+      });
+      return cells;
     },
 
-    submitScan(scannerId, targetId, taskId) {
-      return request("/scan/", {
+    async submitScan(scannerId, targetId, taskId) {
+      // A retry after a timeout gets the original response back, win included
+      const options = {
         method: "POST",
+        headers: { "Idempotency-Key": newIdempotencyKey() },
         body: JSON.stringify({
           scanner_id: scannerId,
           target_id: targetId,
           task_id: taskId,
         }),
+      };
+      for (let attempt = 0; ; attempt++) {
+        try {
+          return await request("/scan/", options);
+        } catch (err) {
+          // fetch rejects with a TypeError when the request never got an answer
+          if (!(err instanceof TypeError) || attempt >= SCAN_RETRIES) {
+            throw err;
+          }
+          await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** attempt));
+        }
+      }
+    },
+
+    submitScanBatch(scannerId, scans) {
+      return request("/scan/batch/", {
+        method: "POST",
+        body: JSON.stringify({
+          scanner_id: scannerId,
+          scans: scans.map(({ targetId, taskId }) => ({
+            target_id: targetId,
+            task_id: taskId,
+          })),
+        }),
       });
     },
 
@@ -54,10 +131,18 @@ const API = (() => {
       return request("/game-state/");
     },
 
+    eventsUrl() {
+      return `${GAME_BASE}/events/`;
+    },
+
     getWinners() {
       return request("/winners/");
     },
 
+    getLeaderboard(limit = 20) {
+      return request(`/leaderboard/?limit=${limit}`);
+    },
+
     getTasks() {
       return request("/tasks/");
     },
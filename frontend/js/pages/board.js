@@ -4,6 +4,7 @@
 
 const BoardPage = (() => {
   let pollTimer = null;
+  let eventSource = null;
   let lastGameState = null;
 
   function render(container) {
@@ -19,11 +20,12 @@ const BoardPage = (() => {
 
   async function loadBoard(container, playerId) {
     try {
-      const [board, gameState, player] = await Promise.all([
-        API.getBoard(playerId),
-        API.getGameState(),
-        API.getPlayer(playerId),
-      ]);
+      const {
+        board,
+        game_state: gameState,
+        player,
+        completed_count: completedCount,
+      } = await API.getBootstrap(playerId, { qr: true });
 
       // Store initial game state
       lastGameState = gameState;
@@ -37,7 +39,6 @@ const BoardPage = (() => {
       // Update header with player info
       updateHeader(player);
 
-      const completedCount = board.filter((c) => c.completed).length;
       const totalCount = board.length;
 
       container.innerHTML = `
@@ -159,30 +160,59 @@ const BoardPage = (() => {
 
   function startPolling(container, playerId) {
     stopPolling();
+    if (window.EventSource) {
+      startEventStream();
+      return;
+    }
+    startIntervalPolling();
+  }
+
+  function startEventStream() {
+    let opened = false;
+    eventSource = new EventSource(API.eventsUrl());
+
+    eventSource.addEventListener("open", () => {
+      opened = true;
+    });
+    eventSource.addEventListener("state", (e) => {
+      handleGameState(JSON.parse(e.data));
+    });
+    eventSource.addEventListener("error", () => {
+      // Server without streaming support — fall back to polling
+      if (!opened) {
+        stopPolling();
+        startIntervalPolling();
+      }
+    });
+  }
+
+  function startIntervalPolling() {
     pollTimer = setInterval(async () => {
       try {
-        const gameState = await API.getGameState();
-
-        // Check if game state changed from active to inactive
-        if (
-          lastGameState &&
-          lastGameState.game_active &&
-          !gameState.game_active
-        ) {
-          stopPolling();
-          // Game just ended - fetch winners and show notification
-          const winners = await API.getWinners();
-          showWinnerNotification(winners);
-          return;
-        }
-
-        lastGameState = gameState;
+        handleGameState(await API.getGameState());
       } catch (_) {
         // Ignore polling errors
       }
     }, 15000); // Poll every 15 seconds
   }
 
+  async function handleGameState(gameState) {
+    // Check if game state changed from active to inactive
+    if (lastGameState && lastGameState.game_active && !gameState.game_active) {
+      stopPolling();
+      // Game just ended - fetch winners and show notification
+      try {
+        const winners = await API.getWinners();
+        showWinnerNotification(winners);
+      } catch (_) {
+        window.location.hash = "#gameover";
+      }
+      return;
+    }
+
+    lastGameState = gameState;
+  }
+
   function showWinnerNotification(winners) {
     // Remove existing modal if any
     const existing = document.getElementById("winner-modal");
@@ -231,6 +261,10 @@ const BoardPage = (() => {
   }
 
   function stopPolling() {
+    if (eventSource) {
+      eventSource.close();
+      eventSource = null;
+    }
     if (pollTimer) {
       clearInterval(pollTimer);
       pollTimer = null;
@@ -125,8 +125,8 @@ const ConfirmPage = (() => {
     try {
       const result = await API.submitScan(playerId, targetId, taskId);
 
-      // Check for win
-      if (result.new_win) {
+      // Check for win; a queued scan only knows it completed the fifth line
+      if (result.new_win || result.win_pending) {
         showWinResult(container);
       } else {
         showSuccessResult(container, result.completed_lines, result.lines_to_win);
@@ -1,38 +1,82 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count
+from django.forms.models import BaseInlineFormSet
 from django.utils.html import format_html
 
-from .models import GameState, Player, ScanRecord, Task, Winner
+from .models import DEFAULT_GAME_SLUG, GameState, Player, ScanRecord, Task, Winner
+
+
+class LatestScansFormSet(BaseInlineFormSet):
+    """Only show the most recent scans; the full list is on the scan changelist."""
+
+    max_shown = 25
+
+    def get_queryset(self):
+        # Slicing returns a fresh queryset each time, so keep the evaluated one
+        if not hasattr(self, "_latest"):
+            self._latest = list(super().get_queryset()[: self.max_shown])
+        return self._latest
 
 
 class ScanRecordInline(admin.TabularInline):
     model = ScanRecord
+    formset = LatestScansFormSet
     fk_name = "scanner"
     extra = 0
     readonly_fields = ("target", "task", "timestamp", "verification_status")
+    # Scans belong to their scanner's game; a select per row would cost a query each
+    exclude = ("game",)
     can_delete = False
     show_change_link = True
     verbose_name = "Scan Record"
-    verbose_name_plural = "Scan Records"
+    verbose_name_plural = f"Latest {LatestScansFormSet.max_shown} Scan Records"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("scanner", "target", "task")
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+def _scans_link(player_id):
+    return format_html(
+        '<a href="/admin/game/scanrecord/?scanner__id__exact={}">View Scans</a>',
+        player_id,
+    )
 
 
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
-    list_display = ("name", "phone", "scan_count", "created_at")
+    list_display = ("name", "phone", "game", "scan_count", "created_at")
+    list_filter = ("game",)
+    list_select_related = ("game",)
     search_fields = ("name", "phone")
-    readonly_fields = ("id", "qr_code")
+    readonly_fields = ("id", "qr_code", "all_scans_link")
     inlines = [ScanRecordInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_scan_count=Count("scans_made"))
+
     def scan_count(self, obj):
-        return obj.scans_made.count()
+        return obj._scan_count
 
     scan_count.short_description = "Scans"
+    scan_count.admin_order_field = "_scan_count"
+
+    def all_scans_link(self, obj):
+        return _scans_link(obj.id)
+
+    all_scans_link.short_description = "All Scan Records"
 
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
-    list_display = ("position", "description")
+    list_display = ("position", "description", "game")
     list_editable = ("description",)
-    ordering = ("position",)
+    list_filter = ("game",)
+    list_select_related = ("game",)
+    ordering = ("game", "position")
     search_fields = ("description",)
 
 
@@ -45,41 +89,56 @@ class ScanRecordAdmin(admin.ModelAdmin):
         "timestamp",
         "verification_status",
     )
-    list_filter = ("verification_status", "timestamp")
+    list_filter = ("game", "verification_status", "timestamp")
+    list_select_related = ("scanner", "target", "task")
     search_fields = ("scanner__name", "target__name", "task__description")
     list_editable = ("verification_status",)
     readonly_fields = ("timestamp",)
+    raw_id_fields = ("scanner", "target")
+    # Skip the unfiltered COUNT(*) over the whole table on every page
+    show_full_result_count = False
 
 
 @admin.register(GameState)
 class GameStateAdmin(admin.ModelAdmin):
-    list_display = ("__str__", "game_active", "max_winners", "allow_duplicate_scans")
+    list_display = ("__str__", "slug", "game_active", "max_winners", "winner_count", "allow_duplicate_scans")
     list_editable = ("game_active", "max_winners", "allow_duplicate_scans")
-
-    def has_add_permission(self, request):
-        # Prevent creating additional instances
-        return not GameState.objects.exists()
+    prepopulated_fields = {"slug": ("name",)}
 
     def has_delete_permission(self, request, obj=None):
-        return False
+        # The default game backs the unprefixed API routes
+        return obj is not None and obj.slug != DEFAULT_GAME_SLUG
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        # Write only what the admin changed, under the row lock submit_scan
+        # takes to admit winners, so its winner_count and game_active survive
+        changed = [name for name in form.changed_data if name in {f.name for f in obj._meta.concrete_fields}]
+        with transaction.atomic():
+            GameState.objects.select_for_update().get(pk=obj.pk)
+            if changed:
+                obj.save(update_fields=changed)
 
 
 @admin.register(Winner)
 class WinnerAdmin(admin.ModelAdmin):
-    list_display = ("player", "win_type", "won_at", "scan_count", "view_scans_link")
-    list_filter = ("win_type",)
+    list_display = ("player", "game", "win_type", "won_at", "scan_count", "view_scans_link")
+    list_filter = ("game", "win_type")
+    list_select_related = ("player", "game")
     readonly_fields = ("won_at", "player_scans")
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_scan_count=Count("player__scans_made"))
+
     def scan_count(self, obj):
-        return ScanRecord.objects.filter(scanner=obj.player).count()
+        return obj._scan_count
 
     scan_count.short_description = "Total Scans"
+    scan_count.admin_order_field = "_scan_count"
 
     def view_scans_link(self, obj):
-        return format_html(
-            '<a href="/admin/game/scanrecord/?scanner__id__exact={}">View Scans</a>',
-            obj.player_id,
-        )
+        return _scans_link(obj.player_id)
 
     view_scans_link.short_description = "Scan Records"
 
@@ -0,0 +1,186 @@
+"""Async versions of the hot API endpoints, used when ``ASYNC_VIEWS`` is on.
+
+They return the same bodies, status codes and validators as the DRF views
+in ``views`` but run on the event loop under ASGI, so a request waiting on
+the database or a slow client doesn't hold a worker thread. Writes still go
+through the sync ``views._record_scan`` in a thread, since transactions
+aren't available to the async ORM.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+
+from . import idempotency, scan_queue
+from .board import get_layout
+from .catalog import aget_catalog, build_board, build_compact_board
+from .models import DEFAULT_GAME_SLUG, GameState, Player, ScanRecord, Winner
+from .routers import reads_from_replica
+from .renderers import dumps
+from .serializers import GameStateSerializer, ScanSubmitSerializer, WinnerSerializer
+from .views import _conditional_response, _record_scan, _set_validators
+
+
+def _json_response(data, status=status.HTTP_200_OK):
+    # Same output as the DRF views' renderer
+    return HttpResponse(dumps(data), status=status, content_type="application/json")
+
+
+async def _get_game(game_slug):
+    try:
+        return await GameState.aget_cached(game_slug)
+    except GameState.DoesNotExist:
+        return None
+
+
+def _game_not_found():
+    return _json_response({"detail": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
+
+
+@reads_from_replica
+@require_GET
+async def get_board(request, player_id, game_slug=DEFAULT_GAME_SLUG):
+    """Get the bingo board for a player with completion status.
+
+    ``?format=compact`` returns task ids in display order and a completion bitmask instead.
+    """
+    game = await _get_game(game_slug)
+    if game is None:
+        return _game_not_found()
+    try:
+        player = await Player.objects.only("id", "completed_mask", "board_layout").aget(
+            id=player_id, game=game
+        )
+    except Player.DoesNotExist:
+        return _json_response({"error": "Player not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    catalog = await aget_catalog(game.pk)
+    compact = request.GET.get("format") == "compact"
+    etag = f'"{player.completed_mask:x}-{catalog.version}{"-c" if compact else ""}"'
+    response = _conditional_response(request, etag=etag)
+    if response is None:
+        board = build_compact_board if compact else build_board
+        response = _json_response(board(get_layout(player), player.completed_mask, catalog))
+    return _set_validators(response, etag=etag)
+
+
+@reads_from_replica
+@require_GET
+async def get_game_state(request, game_slug=DEFAULT_GAME_SLUG):
+    """Get the current game state."""
+    game = await _get_game(game_slug)
+    if game is None:
+        return _game_not_found()
+    etag = f'"{game.version}"'
+    response = _conditional_response(request, etag=etag)
+    if response is None:
+        response = _json_response(GameStateSerializer(game).data)
+    return _set_validators(response, etag=etag)
+
+
+@reads_from_replica
+@require_GET
+async def get_winners(request, game_slug=DEFAULT_GAME_SLUG):
+    """Get the list of winners."""
+    game = await _get_game(game_slug)
+    if game is None:
+        return _game_not_found()
+    summary = await Winner.objects.filter(game=game).order_by().aaggregate(
+        count=Count("id"), last_won_at=Max("won_at")
+    )
+    last_modified = summary["last_won_at"]
+    etag = f'"{summary["count"]}-{last_modified.timestamp() if last_modified else 0}"'
+
+    response = _conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        winners = [winner async for winner in Winner.objects.filter(game=game).select_related("player")]
+        response = _json_response(WinnerSerializer(winners, many=True).data)
+    return _set_validators(response, etag=etag, last_modified=last_modified)
+
+
+@csrf_exempt
+@require_POST
+async def submit_scan(request, game_slug=DEFAULT_GAME_SLUG):
+    """Submit a QR scan to complete a task.
+
+    A retry sent with the same ``Idempotency-Key`` header as an earlier
+    request gets that request's response back, without touching the game.
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return _json_response({"detail": "JSON parse error"}, status=status.HTTP_400_BAD_REQUEST)
+    serializer = ScanSubmitSerializer(data=data)
+    if not serializer.is_valid():
+        return _json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    key = request.headers.get(idempotency.HEADER)
+    if not key:
+        return _json_response(*await _submit_scan(data, game_slug))
+
+    scope = data["scanner_id"]
+    fingerprint = idempotency.fingerprint({**data, "game": game_slug})
+    replay = await idempotency.aclaim(scope, key, fingerprint)
+    if replay is not None:
+        return _json_response(*replay)
+    try:
+        body, code = await _submit_scan(data, game_slug)
+    except BaseException:
+        await idempotency.arelease(scope, key)
+        raise
+    await idempotency.astore(scope, key, fingerprint, body, code)
+    return _json_response(body, status=code)
+
+
+async def _submit_scan(data, game_slug):
+    """Validate and record a scan; returns the response ``(body, status)``."""
+    scanner_id = data["scanner_id"]
+    target_id = data["target_id"]
+    task_id = data["task_id"]
+
+    game = await _get_game(game_slug)
+    if game is None:
+        return {"detail": "Game not found"}, status.HTTP_404_NOT_FOUND
+    if not game.game_active:
+        return {"error": "Game has ended"}, status.HTTP_403_FORBIDDEN
+
+    if scanner_id == target_id:
+        return {"error": "You cannot scan your own QR code"}, status.HTTP_400_BAD_REQUEST
+
+    if settings.SCAN_INGESTION == "queued":
+        return await sync_to_async(scan_queue.submit)(game, scanner_id, target_id, task_id)
+
+    players = {
+        p.id: p
+        async for p in Player.objects.filter(id__in=[scanner_id, target_id], game=game).only(
+            "id", "name", "completed_mask", "board_layout"
+        )
+    }
+    scanner = players.get(scanner_id)
+    if scanner is None:
+        return {"error": "Scanner not found"}, status.HTTP_404_NOT_FOUND
+    target = players.get(target_id)
+    if target is None:
+        return {"error": "Target player not found"}, status.HTTP_404_NOT_FOUND
+
+    task = (await aget_catalog(game.pk)).by_id.get(task_id)
+    if task is None:
+        return {"error": "Task not found"}, status.HTTP_404_NOT_FOUND
+
+    if not game.allow_duplicate_scans:
+        if await ScanRecord.objects.filter(scanner=scanner, target=target).aexists():
+            return {"error": "You already scanned this person"}, status.HTTP_409_CONFLICT
+
+    try:
+        result = await sync_to_async(_record_scan)(scanner, target, task, game)
+    except IntegrityError:
+        return {"error": "You already completed this task"}, status.HTTP_409_CONFLICT
+    return result, status.HTTP_201_CREATED
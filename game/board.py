@@ -0,0 +1,77 @@
+import random
+from functools import lru_cache
+
+BOARD_SIZE = 5
+CELL_COUNT = BOARD_SIZE * BOARD_SIZE
+LINES_TO_WIN = 5
+
+
+def _line_mask(positions):
+    mask = 0
+    for pos in positions:
+        mask |= 1 << pos
+    return mask
+
+
+# One bitmask per winnable line, in display coordinates (bit i = display slot i)
+LINE_MASKS = tuple(
+    [_line_mask(range(row * 5, row * 5 + 5)) for row in range(5)]
+    + [_line_mask(col + row * 5 for row in range(5)) for col in range(5)]
+    + [_line_mask((0, 6, 12, 18, 24)), _line_mask((4, 8, 12, 16, 20))]
+)
+
+
+@lru_cache(maxsize=4096)
+def generate_layout(player_id):
+    """Return a player's board layout as bytes: byte i is the display cell of task position i.
+
+    Each player gets a unique but deterministic layout seeded by their UUID.
+    """
+    rng = random.Random(str(player_id))
+    positions = list(range(CELL_COUNT))
+    rng.shuffle(positions)
+    # positions[i] = the original DB position of the task shown at display slot i
+    # We need the inverse: original_pos -> display_pos
+    layout = bytearray(CELL_COUNT)
+    for display, orig in enumerate(positions):
+        layout[orig] = display
+    return bytes(layout)
+
+
+def get_layout(player):
+    """Return the stored layout for a player, falling back to generating it."""
+    if player.board_layout:
+        return bytes(player.board_layout)
+    return generate_layout(player.id)
+
+
+def display_position(layout, task_position):
+    """Return the display cell for a task position, or None if it is off-board."""
+    if 0 <= task_position < len(layout):
+        return layout[task_position]
+    return None
+
+
+def cell_bit(layout, task_position):
+    """Return the completion bit for a task on a board, or 0 if off-board."""
+    display = display_position(layout, task_position)
+    return 0 if display is None else 1 << display
+
+
+def build_mask(layout, task_positions):
+    """Build a completion mask from the DB positions of completed tasks."""
+    mask = 0
+    for pos in task_positions:
+        mask |= cell_bit(layout, pos)
+    return mask
+
+
+def count_lines(mask):
+    """Count how many lines (rows, columns, diagonals) are complete in a mask."""
+    return sum(1 for line in LINE_MASKS if mask & line == line)
+
+
+def count_cells(mask):
+    """Count how many cells are complete in a mask."""
+    return mask.bit_count()
+
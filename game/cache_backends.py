@@ -0,0 +1,53 @@
+import fcntl
+import os
+import random
+
+from django.core.cache.backends import filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    """Django's file cache with an ``add`` that is atomic across processes.
+
+    The stock ``add`` checks for the key and writes it in two steps, so two
+    workers can both claim the same key. Here adds to one cache directory
+    are serialized with an exclusive lock on a file beside the entries.
+
+    Culling, which lists the whole directory on every ``set``, drops expired
+    entries before live ones. ``MAX_ENTRIES: None`` turns it off, for caches
+    bounded some other way, so their sets never list the directory.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        if params.get("OPTIONS", {}).get("MAX_ENTRIES", 300) is None:
+            self._max_entries = None
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._createdir()
+        with open(os.path.join(self._dir, "add.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                return super().add(key, value, timeout, version)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _cull(self):
+        if self._max_entries is None:
+            return
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+        live = []
+        for fname in filelist:
+            try:
+                with open(fname, "rb") as f:
+                    if not self._is_expired(f):
+                        live.append(fname)
+            except FileNotFoundError:
+                pass
+        if len(live) >= self._max_entries:
+            for fname in random.sample(live, len(live) // self._cull_frequency):
+                self._delete(fname)
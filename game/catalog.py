@@ -0,0 +1,94 @@
+import uuid
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .board import display_position
+from .models import Task
+
+CATALOG_VERSION_KEY = "task-catalog-version"
+
+TaskCatalog = namedtuple("TaskCatalog", ["version", "tasks", "by_id", "cells"])
+
+# This process's loaded catalog per game id; each is replaced wholesale when the version changes
+_catalogs = {}
+
+
+def get_catalog_version():
+    """Return an opaque token that changes whenever any Task in any game is saved or deleted."""
+    return cache.get_or_set(CATALOG_VERSION_KEY, lambda: uuid.uuid4().hex[:12], timeout=None)
+
+
+def bump_catalog_version():
+    _catalogs.clear()
+    cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex[:12], timeout=None)
+
+
+def _load_catalog(game_id, version, tasks):
+    catalog = _catalogs[game_id] = TaskCatalog(
+        version=version,
+        tasks=tasks,
+        by_id={task.id: task for task in tasks},
+        cells=tuple(
+            {"task_id": task.id, "description": task.description, "position": task.position}
+            for task in tasks
+        ),
+    )
+    return catalog
+
+
+def _game_tasks(game_id):
+    # Always the primary: a catalog loaded from a lagging replica would be
+    # kept until the next task change
+    return Task.objects.using(DEFAULT_DB_ALIAS).filter(game_id=game_id)
+
+
+def get_catalog(game_id):
+    """Return a game's task catalog, loading it from the database only when it changed.
+
+    ``cells`` holds the immutable part of each board cell, in task order,
+    with the task's original grid position.
+    """
+    version = get_catalog_version()
+    catalog = _catalogs.get(game_id)
+    if catalog is None or catalog.version != version:
+        catalog = _load_catalog(game_id, version, tuple(_game_tasks(game_id)))
+    return catalog
+
+
+async def aget_catalog(game_id):
+    """Async version of ``get_catalog``."""
+    version = await cache.aget_or_set(CATALOG_VERSION_KEY, lambda: uuid.uuid4().hex[:12], timeout=None)
+    catalog = _catalogs.get(game_id)
+    if catalog is None or catalog.version != version:
+        tasks = tuple([task async for task in _game_tasks(game_id)])
+        catalog = _load_catalog(game_id, version, tasks)
+    return catalog
+
+
+def build_compact_board(layout, mask, catalog):
+    """Return a player's board as task ids in display order plus the completion mask.
+
+    ``tasks[cell]`` is the id of the task shown in display cell ``cell``, or
+    None for an empty cell, and bit ``cell`` of ``mask`` is set once it is
+    completed. Descriptions come from the tasks endpoint.
+    """
+    tasks = [None] * len(layout)
+    for cell in catalog.cells:
+        display = display_position(layout, cell["position"])
+        if display is not None:
+            tasks[display] = cell["task_id"]
+    return {"tasks": tasks, "mask": mask}
+
+
+def build_board(layout, mask, catalog):
+    """Return a player's board cells from their layout, completion mask and game catalog."""
+    cells = []
+    for cell in catalog.cells:
+        display = display_position(layout, cell["position"])
+        if display is None:
+            cells.append({**cell, "completed": False})
+        else:
+            cells.append({**cell, "position": display, "completed": bool(mask >> display & 1)})
+    return cells
@@ -0,0 +1,194 @@
+"""Server-Sent Events stream of game state and new winners.
+
+All clients of a game connected to a process share one ``ChangeNotifier``,
+which reads the game's state row on a fixed interval (only while someone is listening) and
+fans changes out to every subscriber. This module is mounted directly in
+``bingo_project/asgi.py``; under WSGI the endpoint does not exist and clients
+fall back to polling ``/api/game-state/``.
+"""
+
+import asyncio
+import json
+import logging
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+
+from .models import DEFAULT_GAME_SLUG, GameState, Winner
+from .serializers import WinnerSerializer
+
+logger = logging.getLogger(__name__)
+
+# /api/events/ for the default game, /api/games/<slug>/events/ for any game
+EVENTS_PATH_RE = re.compile(r"^/api/(?:games/(?P<slug>[-a-zA-Z0-9_]+)/)?events/$")
+
+
+def events_game_slug(path):
+    """Return the game slug an events URL is for, or None for other paths."""
+    match = EVENTS_PATH_RE.match(path)
+    if match is None:
+        return None
+    return match["slug"] or DEFAULT_GAME_SLUG
+
+
+def _format_event(event, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    return f"event: {event}\ndata: {payload}\n\n".encode()
+
+
+class ChangeNotifier:
+    """Polls a game's state once per interval and broadcasts changes to subscribers."""
+
+    def __init__(self, slug, interval):
+        self.slug = slug
+        self.interval = interval
+        self.state = None
+        self._last_winner_id = None
+        self._subscribers = set()
+        self._task = None
+        self._game_id = None
+
+    async def subscribe(self):
+        """Return a queue of events; raises GameState.DoesNotExist for an unknown game."""
+        if self.state is None:
+            await self._refresh()
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def _broadcast(self, message):
+        for queue in self._subscribers:
+            queue.put_nowait(message)
+
+    async def _run(self):
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            # No request cycle closes this loop's connection, so drop it here
+            # once it broke or outlived CONN_MAX_AGE
+            await sync_to_async(close_old_connections)()
+            try:
+                await self._refresh()
+            except Exception:
+                # Keep the stream alive through transient DB errors
+                logger.exception("Refreshing events for game %r failed", self.slug)
+        # Drop the cached snapshot so the next subscriber starts fresh
+        self.state = None
+        self._last_winner_id = None
+
+    async def _refresh(self):
+        state = await GameState.objects.filter(slug=self.slug).values(
+            "id", "game_active", "max_winners", "winner_count"
+        ).afirst()
+        if state is None and self.slug != DEFAULT_GAME_SLUG:
+            raise GameState.DoesNotExist
+        if state is None:
+            # No row yet; report the model defaults like GameState.get_instance would
+            defaults = GameState()
+            state = {
+                "game_active": defaults.game_active,
+                "max_winners": defaults.max_winners,
+                "winner_count": defaults.winner_count,
+            }
+        else:
+            self._game_id = state.pop("id")
+        if state == self.state:
+            return
+
+        # Only touch the Winner table when the maintained count moved
+        if self._last_winner_id is None:
+            last = await Winner.objects.filter(game_id=self._game_id).order_by("-id").values_list(
+                "id", flat=True
+            ).afirst()
+            self._last_winner_id = last or 0
+        elif self.state is None or state["winner_count"] != self.state["winner_count"]:
+            new_winners = Winner.objects.select_related("player").filter(
+                game_id=self._game_id, id__gt=self._last_winner_id
+            ).order_by("id")
+            async for winner in new_winners:
+                self._last_winner_id = winner.id
+                self._broadcast(_format_event("winner", WinnerSerializer(winner).data))
+
+        self.state = state
+        self._broadcast(_format_event("state", state))
+
+
+_notifiers = {}
+
+
+def get_notifier(slug):
+    """Return the process-wide notifier for a game, creating it on first use."""
+    if slug not in _notifiers:
+        _notifiers[slug] = ChangeNotifier(slug, getattr(settings, "EVENTS_POLL_INTERVAL", 2))
+    return _notifiers[slug]
+
+
+def _cors_headers(scope):
+    origin = dict(scope["headers"]).get(b"origin")
+    if origin and (
+        settings.CORS_ALLOW_ALL_ORIGINS or origin.decode() in settings.CORS_ALLOWED_ORIGINS
+    ):
+        return [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+    return []
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def event_stream(scope, receive, send, slug=DEFAULT_GAME_SLUG):
+    """ASGI handler for ``/api/events/`` and ``/api/games/<slug>/events/``."""
+    notifier = get_notifier(slug)
+    try:
+        queue = await notifier.subscribe()
+    except GameState.DoesNotExist:
+        # Don't keep a notifier for every slug a client makes up
+        if not notifier._subscribers:
+            _notifiers.pop(slug, None)
+        await send({"type": "http.response.start", "status": 404, "headers": _cors_headers(scope)})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+                *_cors_headers(scope),
+            ],
+        }
+    )
+
+    disconnected = asyncio.create_task(_wait_for_disconnect(receive))
+    try:
+        message = _format_event("state", notifier.state)
+        while True:
+            await send({"type": "http.response.body", "body": message, "more_body": True})
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {getter, disconnected}, timeout=15, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter not in done:
+                getter.cancel()
+            if disconnected in done:
+                break
+            # A comment line on timeout keeps proxies from closing an idle connection
+            message = getter.result() if getter in done else b": ping\n\n"
+    except OSError:
+        pass
+    finally:
+        notifier.unsubscribe(queue)
+        disconnected.cancel()
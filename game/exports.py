@@ -0,0 +1,111 @@
+import csv
+import zlib
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Player, ScanRecord, Winner
+
+Export = namedtuple("Export", ["columns", "queryset"])
+
+EXPORTS = {
+    "scans": Export(
+        columns=(
+            "id", "scanner_id", "scanner_name", "target_id", "target_name",
+            "task_id", "task_description", "timestamp", "verification_status", "game",
+        ),
+        queryset=lambda: ScanRecord.objects.order_by("id").values_list(
+            "id", "scanner_id", "scanner__name", "target_id", "target__name",
+            "task_id", "task__description", "timestamp", "verification_status", "game__slug",
+        ),
+    ),
+    "winners": Export(
+        columns=("id", "player_id", "player_name", "player_phone", "win_type", "won_at", "game"),
+        queryset=lambda: Winner.objects.order_by("won_at", "id").values_list(
+            "id", "player_id", "player__name", "player__phone", "win_type", "won_at", "game__slug",
+        ),
+    ),
+    "players": Export(
+        columns=(
+            "id", "name", "phone", "cells_completed", "lines_completed",
+            "last_progress_at", "created_at", "game",
+        ),
+        queryset=lambda: Player.objects.order_by("created_at", "id").values_list(
+            "id", "name", "phone", "cells_completed", "lines_completed",
+            "last_progress_at", "created_at", "game__slug",
+        ),
+    ),
+}
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Bytes collected before a chunk is handed to the response or file
+FLUSH_SIZE = 64 * 1024
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, so csv.writer yields lines."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for values in rows:
+        yield writer.writerow(values)
+
+
+def _ndjson_lines(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for values in rows:
+        yield encoder.encode(dict(zip(columns, values))) + "\n"
+
+
+_WRITERS = {
+    "csv": _csv_lines,
+    "ndjson": _ndjson_lines,
+}
+
+
+def iter_export(name, fmt="csv", compress=False, chunk_size=2000, using=None):
+    """Yield an export as byte chunks, reading ``chunk_size`` rows at a time.
+
+    Memory stays flat however many rows there are; with ``compress`` the
+    chunks form a gzip stream. ``using`` picks the database to read from.
+    """
+    export = EXPORTS[name]
+    rows = export.queryset().using(using).iterator(chunk_size=chunk_size)
+    gzip = zlib.compressobj(wbits=31) if compress else None
+
+    pending = []
+    size = 0
+    for line in _WRITERS[fmt](export.columns, rows):
+        pending.append(line)
+        size += len(line)
+        if size >= FLUSH_SIZE:
+            data = "".join(pending).encode()
+            pending, size = [], 0
+            if gzip:
+                data = gzip.compress(data)
+            if data:
+                yield data
+
+    data = "".join(pending).encode()
+    if gzip:
+        data = gzip.compress(data) + gzip.flush()
+    if data:
+        yield data
+
+
+async def aiter_export(*args, **kwargs):
+    """Async version of ``iter_export``, for streaming responses under ASGI."""
+    chunks = iter_export(*args, **kwargs)
+    next_chunk = sync_to_async(lambda: next(chunks, None))
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
@@ -0,0 +1,130 @@
+"""Replay the first response to a request retried with the same ``Idempotency-Key``.
+
+The first request to use a key claims it by inserting an
+``IdempotencyRecord``; the unique constraint on scanner and key lets exactly
+one of several concurrent requests through. Its response is then kept for
+``IDEMPOTENCY_KEY_TTL`` seconds and every retry with the key gets that
+response back without redoing the work. Keys are scoped per scanner.
+"""
+
+import hashlib
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+
+from .models import IdempotencyRecord
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+# Seconds a claim is held while its request is processed
+CLAIM_TIMEOUT = 30
+
+# Seconds between each process's sweeps of expired records
+PURGE_INTERVAL = 60
+
+KEY_TOO_LONG = (
+    {"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"},
+    status.HTTP_400_BAD_REQUEST,
+)
+IN_PROGRESS = (
+    {"error": f"A request with this {HEADER} is still being processed"},
+    status.HTTP_409_CONFLICT,
+)
+KEY_REUSED = (
+    {"error": f"{HEADER} was already used for a different request"},
+    status.HTTP_422_UNPROCESSABLE_ENTITY,
+)
+
+_next_purge = 0
+
+
+def fingerprint(data):
+    """Hash a request's validated data, so a key reused for another request is caught."""
+    canonical = "\n".join(f"{name}={data[name]}" for name in sorted(data))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _replay(record, request_fingerprint):
+    if record.status_code is None:
+        return IN_PROGRESS
+    if record.fingerprint != request_fingerprint:
+        return KEY_REUSED
+    return record.response, record.status_code
+
+
+def _purge_expired():
+    global _next_purge
+    now = time.monotonic()
+    if now >= _next_purge:
+        _next_purge = now + PURGE_INTERVAL
+        IdempotencyRecord.objects.filter(expires_at__lt=timezone.now()).delete()
+
+
+def claim(scope, key, request_fingerprint):
+    """Claim a key for a new request.
+
+    Returns None if the caller should process the request, or the
+    ``(data, status)`` to answer a retry with.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        return KEY_TOO_LONG
+    _purge_expired()
+    now = timezone.now()
+    # A second attempt follows an expired or released record
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    scanner_id=scope,
+                    key=key,
+                    fingerprint=request_fingerprint,
+                    expires_at=now + timedelta(seconds=CLAIM_TIMEOUT),
+                )
+            return None
+        except IntegrityError:
+            pass
+        try:
+            record = IdempotencyRecord.objects.get(scanner_id=scope, key=key)
+        except IdempotencyRecord.DoesNotExist:
+            continue
+        if record.expires_at > now:
+            return _replay(record, request_fingerprint)
+        # Only one request may take over an expired record
+        IdempotencyRecord.objects.filter(pk=record.pk, expires_at=record.expires_at).delete()
+    return IN_PROGRESS
+
+
+def store(scope, key, request_fingerprint, data, status_code):
+    """Save a claimed request's response; server errors release the key for a retry."""
+    records = IdempotencyRecord.objects.filter(scanner_id=scope, key=key, fingerprint=request_fingerprint)
+    if status_code >= 500:
+        records.delete()
+    else:
+        expires_at = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        records.update(status_code=status_code, response=data, expires_at=expires_at)
+
+
+def release(scope, key):
+    """Drop a claim whose request failed without a response."""
+    IdempotencyRecord.objects.filter(scanner_id=scope, key=key, status_code__isnull=True).delete()
+
+
+async def aclaim(scope, key, request_fingerprint):
+    """Async version of ``claim``."""
+    return await sync_to_async(claim)(scope, key, request_fingerprint)
+
+
+async def astore(scope, key, request_fingerprint, data, status_code):
+    """Async version of ``store``."""
+    await sync_to_async(store)(scope, key, request_fingerprint, data, status_code)
+
+
+async def arelease(scope, key):
+    """Async version of ``release``."""
+    await sync_to_async(release)(scope, key)
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Player
+from .serializers import LeaderboardEntrySerializer
+
+Leaderboard = namedtuple("Leaderboard", ["entries", "etag", "fresh_until"])
+
+# How long a rebuild may hold the lock before another worker takes over
+REBUILD_LOCK_TIMEOUT = 10
+
+
+def _cache_key(game_id, limit):
+    return f"leaderboard:{game_id}:{limit}"
+
+
+def _cache():
+    return caches[settings.LEADERBOARD_CACHE_ALIAS]
+
+
+def build_leaderboard(game_id, limit):
+    """Read a game's top ``limit`` players straight from the score columns."""
+    players = (
+        Player.objects.filter(game_id=game_id, cells_completed__gt=0)
+        .order_by("-lines_completed", "-cells_completed", "last_progress_at")
+        .only("id", "name", "cells_completed", "lines_completed", "last_progress_at")[:limit]
+    )
+    entries = [
+        {"rank": rank, **entry}
+        for rank, entry in enumerate(LeaderboardEntrySerializer(players, many=True).data, start=1)
+    ]
+    digest = hashlib.sha256(json.dumps(entries).encode()).hexdigest()[:32]
+    return Leaderboard(
+        entries=entries,
+        etag=f'"{digest}"',
+        fresh_until=time.time() + settings.LEADERBOARD_CACHE_TTL,
+    )
+
+
+def get_leaderboard(game_id, limit):
+    """Return a game's top ``limit`` players, cached for ``LEADERBOARD_CACHE_TTL`` seconds.
+
+    Once the cached copy goes stale a single worker rebuilds it while the
+    others keep serving the stale copy, so a refreshing big screen never sends
+    a burst of identical queries to the database.
+    """
+    cache = _cache()
+    key = _cache_key(game_id, limit)
+    board = cache.get(key)
+    if board is not None and time.time() < board.fresh_until:
+        return board
+    lock_key = f"{key}:lock"
+    if board is not None and not cache.add(lock_key, True, timeout=REBUILD_LOCK_TIMEOUT):
+        return board
+
+    try:
+        board = build_leaderboard(game_id, limit)
+        # Keep stale copies around well past the TTL for the other workers to serve
+        cache.set(key, board, timeout=settings.LEADERBOARD_CACHE_TTL + REBUILD_LOCK_TIMEOUT * 6)
+    finally:
+        cache.delete(lock_key)
+    return board
@@ -0,0 +1,171 @@
+import io
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from game.board import CELL_COUNT, generate_layout
+from game.catalog import bump_catalog_version
+from game.models import GameState, Player, ScanRecord, Task
+
+# Indexes added by 0008_scanrecord_indexes (the status one reworked per game
+# in 0010_games_constraints), dropped for the "before" run
+BENCHMARKED_INDEXES = ("scan_scanner_target_task_idx", "scan_game_status_time_idx")
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with scan records and compare query plans and "
+        "timings of the hot ScanRecord lookups without and with their indexes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Scan records to seed.")
+        parser.add_argument("--repeat", type=int, default=200, help="Executions timed per query.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options["rows"] < CELL_COUNT * 2:
+            raise CommandError(f"--rows must be at least {CELL_COUNT * 2}.")
+        self.rng = random.Random(options["seed"])
+
+        if connection.vendor == "sqlite":
+            # Keep the seeded table on disk so plans and timings are realistic
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            indexes = [index for index in ScanRecord._meta.indexes if index.name in BENCHMARKED_INDEXES]
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(ScanRecord, index)
+
+            players = self.seed(options["rows"])
+            queries = self.queries(players)
+            report = {"vendor": connection.vendor, "rows": ScanRecord.objects.count()}
+
+            self.stderr.write("Timing without indexes...")
+            report["before"] = self.measure(queries, options["repeat"])
+
+            self.stderr.write("Building indexes...")
+            start = time.perf_counter()
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(ScanRecord, index)
+            report["index_build_s"] = round(time.perf_counter() - start, 3)
+
+            self.stderr.write("Timing with indexes...")
+            report["after"] = self.measure(queries, options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            bump_catalog_version()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def seed(self, rows):
+        call_command("seed_tasks", stdout=io.StringIO())
+        tasks = list(Task.objects.values_list("id", flat=True))
+        self.game_id = GameState.get_instance().pk
+        player_count = -(-rows // len(tasks))
+
+        self.stderr.write(f"Seeding {player_count} players and {rows} scan records...")
+        players = []
+        for start in range(0, player_count, 5000):
+            batch = []
+            for i in range(start, min(start + 5000, player_count)):
+                player_id = uuid.uuid4()
+                batch.append(
+                    Player(id=player_id, game_id=self.game_id, name=f"Bench {i}", phone=f"{6000000000 + i}",
+                           board_layout=generate_layout(player_id))
+                )
+            Player.objects.bulk_create(batch)
+            players.extend(player.id for player in batch)
+
+        statuses = [choice for choice, _ in ScanRecord.VerificationStatus.choices]
+        pending = []
+        remaining = rows
+        for scanner_id in players:
+            # Every scanner completes a run of tasks, each with a different target
+            for task_id in tasks[: min(len(tasks), remaining)]:
+                pending.append(
+                    ScanRecord(
+                        game_id=self.game_id,
+                        scanner_id=scanner_id,
+                        target_id=self.rng.choice(players),
+                        task_id=task_id,
+                        verification_status=self.rng.choice(statuses),
+                    )
+                )
+            remaining -= len(tasks)
+            if len(pending) >= 10000:
+                ScanRecord.objects.bulk_create(pending)
+                pending = []
+        ScanRecord.objects.bulk_create(pending)
+        return players
+
+    def queries(self, players):
+        """Return (name, factory, mode) triples; each factory builds a queryset for random arguments."""
+        rng = self.rng
+        return [
+            (
+                "duplicate_target_check",
+                lambda: ScanRecord.objects.filter(
+                    scanner_id=rng.choice(players), target_id=rng.choice(players)
+                ).order_by(),
+                "exists",
+            ),
+            (
+                "scanner_target_task_pairs",
+                lambda: ScanRecord.objects.filter(scanner_id=rng.choice(players))
+                .order_by()
+                .values_list("target_id", "task_id"),
+                "list",
+            ),
+            (
+                "admin_status_changelist",
+                lambda: ScanRecord.objects.filter(
+                    game_id=self.game_id, verification_status=rng.choice(["pending", "approved"])
+                )
+                .order_by("-timestamp")[:100],
+                "list",
+            ),
+        ]
+
+    def measure(self, queries, repeat):
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE game_scanrecord" if connection.vendor == "postgresql" else "ANALYZE")
+
+        results = {}
+        for name, factory, mode in queries:
+            queryset = factory()[:1] if mode == "exists" else factory()
+            plan = queryset.explain(analyze=True) if connection.vendor == "postgresql" else queryset.explain()
+            timings = []
+            for _ in range(repeat):
+                queryset = factory()
+                start = time.perf_counter()
+                queryset.exists() if mode == "exists" else list(queryset)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            results[name] = {
+                "plan": plan.splitlines(),
+                "mean_ms": round(sum(timings) / len(timings), 3),
+                "p50_ms": round(_percentile(timings, 50), 3),
+                "p95_ms": round(_percentile(timings, 95), 3),
+            }
+        return results
@@ -0,0 +1,184 @@
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory, override_settings
+
+from game import scan_queue, views
+from game.board import CELL_COUNT, generate_layout
+from game.catalog import bump_catalog_version
+from game.models import GameState, Player, ScanRecord, Task, Winner
+
+from .loadtest import _percentile
+
+MODES = ("sync", "queued")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, submit the same rush of scans through the synchronous "
+        "and the write-behind ingestion paths, and compare sustained scans per second as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+        parser.add_argument("--players", type=int, default=400)
+        parser.add_argument("--scans", type=int, default=5000, help="Scans submitted per mode.")
+        parser.add_argument("--db-latency-ms", type=float, default=2,
+                            help="Delay added to every query, standing in for a remote database.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options["players"] <= CELL_COUNT:
+            raise CommandError(f"--players must be more than {CELL_COUNT}.")
+        self.rng = random.Random(options["seed"])
+        self.delay = options["db_latency_ms"] / 1000
+        self.request_thread = threading.get_ident()
+        self.request_queries = 0
+        workdir = tempfile.mkdtemp(prefix="bingo-ingestion-")
+
+        if connection.vendor == "sqlite":
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(workdir, "benchmark.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        connection_created.connect(self.install_latency)
+        self.install_latency(connection=connection)
+        try:
+            scans = self.seed(options["players"], options["scans"])
+            report = {
+                "vendor": connection.vendor,
+                "players": options["players"],
+                "scans": len(scans),
+                "db_latency_ms": options["db_latency_ms"],
+                "modes": {},
+            }
+            for mode in options["modes"]:
+                self.stderr.write(f"Submitting {len(scans)} scans in {mode} mode...")
+                self.reset()
+                journal = os.path.join(workdir, f"{mode}-journal.sqlite3")
+                with override_settings(SCAN_INGESTION=mode, SCAN_QUEUE_PATH=journal, SCAN_QUEUE_WRITER_THREAD=False):
+                    report["modes"][mode] = self.run_mode(mode, scans)
+        finally:
+            connection_created.disconnect(self.install_latency)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            bump_catalog_version()
+            GameState.invalidate_cache()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def install_latency(self, connection, **kwargs):
+        def slow_query(execute, sql, params, many, context):
+            if threading.get_ident() == self.request_thread:
+                self.request_queries += 1
+            if self.delay:
+                time.sleep(self.delay)
+            return execute(sql, params, many, context)
+
+        connection.execute_wrappers.append(slow_query)
+
+    def seed(self, player_count, scan_count):
+        call_command("seed_tasks", stdout=io.StringIO())
+        game = GameState.get_instance()
+        # Keep the game running however many players finish
+        game.max_winners = player_count + 1
+        game.save()
+        tasks = list(Task.objects.filter(game=game).values_list("id", flat=True))
+
+        players = []
+        for i in range(player_count):
+            player_id = uuid.uuid4()
+            players.append(
+                Player(id=player_id, game=game, name=f"Bench {i}", phone=f"{7000000000 + i}",
+                       board_layout=generate_layout(player_id))
+            )
+        Player.objects.bulk_create(players)
+        ids = [player.id for player in players]
+
+        # Everyone scans at once: each player's n-th scan before anyone's (n+1)-th
+        orders = {player_id: self.rng.sample(tasks, len(tasks)) for player_id in ids}
+        scans = []
+        for round_ in range(len(tasks)):
+            for i, scanner_id in enumerate(ids):
+                target_id = ids[(i + round_ + 1) % len(ids)]
+                scans.append((scanner_id, target_id, orders[scanner_id][round_]))
+        return scans[:scan_count]
+
+    def reset(self):
+        ScanRecord.objects.all().delete()
+        Winner.objects.all().delete()
+        Player.objects.update(completed_mask=0, cells_completed=0, lines_completed=0, last_progress_at=None)
+        game = GameState.get_instance()
+        game.winner_count = 0
+        game.game_active = True
+        game.save()
+        scan_queue.clear_cache()
+
+    def run_mode(self, mode, scans):
+        factory = RequestFactory()
+        stop = threading.Event()
+        writer = threading.Thread(target=self.write_behind, args=(stop,)) if mode == "queued" else None
+        if writer:
+            writer.start()
+
+        latencies = []
+        statuses = {}
+        self.request_queries = 0
+        start = time.perf_counter()
+        try:
+            for scanner_id, target_id, task_id in scans:
+                request = factory.post(
+                    "/api/scan/",
+                    {"scanner_id": str(scanner_id), "target_id": str(target_id), "task_id": task_id},
+                    content_type="application/json",
+                )
+                began = time.perf_counter()
+                response = views.submit_scan(request)
+                latencies.append((time.perf_counter() - began) * 1000)
+                statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            acknowledged = time.perf_counter() - start
+            if writer:
+                while scan_queue.pending_count():
+                    time.sleep(0.01)
+            persisted = time.perf_counter() - start
+        finally:
+            stop.set()
+            if writer:
+                writer.join()
+
+        latencies.sort()
+        return {
+            "statuses": statuses,
+            "acknowledged_s": round(acknowledged, 3),
+            "acknowledged_per_s": round(len(scans) / acknowledged, 1),
+            "persisted_s": round(persisted, 3),
+            "persisted_per_s": round(len(scans) / persisted, 1),
+            "p50_ms": round(_percentile(latencies, 50), 3),
+            "p95_ms": round(_percentile(latencies, 95), 3),
+            "p99_ms": round(_percentile(latencies, 99), 3),
+            "request_queries_per_scan": round(self.request_queries / len(scans), 2),
+            "scan_records": ScanRecord.objects.count(),
+        }
+
+    def write_behind(self, stop):
+        # The writer thread a web process would run, stoppable between modes
+        try:
+            while not stop.is_set():
+                if not scan_queue.flush(settings.SCAN_QUEUE_BATCH_SIZE):
+                    time.sleep(settings.SCAN_QUEUE_FLUSH_INTERVAL)
+        finally:
+            connection.close()
@@ -0,0 +1,252 @@
+import asyncio
+import csv
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .loadtest import _percentile
+
+SERVERS = {
+    "sync": ["bingo_project.wsgi:application"],
+    "async": ["bingo_project.asgi:application", "--worker-class", "uvicorn_worker.UvicornWorker"],
+}
+
+# Relative weight of each request in the mix
+REQUEST_WEIGHTS = {
+    "board": 35,
+    "game-state": 40,
+    "scan": 20,
+    "winners": 5,
+}
+
+# gunicorn hook that adds a fixed delay to every query, standing in for a
+# remote database under load
+GUNICORN_CONFIG = """
+import os
+import time
+
+
+def post_worker_init(worker):
+    from django.db.backends.signals import connection_created
+
+    delay = float(os.environ["BENCHMARK_DB_LATENCY_MS"]) / 1000
+
+    def slow_query(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(slow_query)
+
+    if delay:
+        connection_created.connect(install, weak=False)
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the app under a sync gunicorn worker and under an ASGI worker with async views, "
+        "hold many concurrent slow clients against each, and print throughput and latency as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", nargs="+", choices=sorted(SERVERS), default=["sync", "async"])
+        parser.add_argument("--connections", type=int, default=1000, help="Concurrent clients.")
+        parser.add_argument("--duration", type=float, default=20, help="Seconds to run each mode for.")
+        parser.add_argument("--workers", type=int, default=1, help="Server processes per mode.")
+        parser.add_argument("--players", type=int, default=200)
+        parser.add_argument("--slow-client-ms", type=float, default=200,
+                            help="Delay between the two halves of each request, like a slow mobile uplink.")
+        parser.add_argument("--db-latency-ms", type=float, default=5, help="Delay added to every query.")
+        parser.add_argument("--timeout", type=float, default=30, help="Seconds before a request counts as failed.")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        workdir = tempfile.mkdtemp(prefix="bingo-benchmark-")
+        db_path = os.path.join(workdir, "benchmark.sqlite3")
+        config_path = os.path.join(workdir, "gunicorn.conf.py")
+        with open(config_path, "w") as f:
+            f.write(GUNICORN_CONFIG)
+
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            "CACHE_DIR": os.path.join(workdir, "cache"),
+            "DEBUG": "False",
+            # Every request is slow by design; don't log each one
+            "METRICS_SLOW_REQUEST_MS": "inf",
+            "BENCHMARK_DB_LATENCY_MS": str(options["db_latency_ms"]),
+        }
+        self.prepare_database(env, workdir, db_path, options["players"])
+
+        report = {
+            "connections": options["connections"],
+            "workers": options["workers"],
+            "slow_client_ms": options["slow_client_ms"],
+            "db_latency_ms": options["db_latency_ms"],
+            "modes": {},
+        }
+        for mode in options["modes"]:
+            self.stderr.write(f"Benchmarking {mode} mode...")
+            report["modes"][mode] = self.run_mode(mode, env, config_path, options)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def manage(self, env, *args):
+        subprocess.run(
+            [sys.executable, "manage.py", *args],
+            cwd=settings.BASE_DIR, env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+
+    def prepare_database(self, env, workdir, db_path, player_count):
+        self.stderr.write("Preparing benchmark database...")
+        self.manage(env, "migrate", "--no-input")
+        self.manage(env, "seed_tasks")
+        csv_path = os.path.join(workdir, "players.csv")
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "phone"])
+            writer.writerows([f"Bench {i}", f"{5000000000 + i}"] for i in range(player_count))
+        self.manage(env, "import_players", csv_path)
+
+        db = sqlite3.connect(db_path)
+        try:
+            # Keep the game running for the whole benchmark
+            db.execute("UPDATE game_gamestate SET max_winners = ?", (player_count + 1,))
+            db.commit()
+            self.players = [str(uuid.UUID(row[0])) for row in db.execute("SELECT id FROM game_player")]
+            self.tasks = [row[0] for row in db.execute("SELECT id FROM game_task")]
+        finally:
+            db.close()
+
+    def run_mode(self, mode, env, config_path, options):
+        port = options["port"]
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn", *SERVERS[mode],
+                "--workers", str(options["workers"]),
+                "--bind", f"127.0.0.1:{port}",
+                "--config", config_path,
+                "--backlog", str(max(2048, options["connections"] * 2)),
+                "--log-level", "warning",
+            ],
+            cwd=settings.BASE_DIR,
+            env={**env, "ASYNC_VIEWS": str(mode == "async")},
+        )
+        try:
+            self.wait_for_port(port)
+            samples, elapsed = asyncio.run(self.drive(port, options))
+        finally:
+            server.terminate()
+            server.wait()
+        return self.summarize(samples, elapsed)
+
+    def wait_for_port(self, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Server did not start listening on port {port}.")
+
+    def build_request(self, rng):
+        kind = rng.choices(*zip(*REQUEST_WEIGHTS.items()))[0]
+        if kind == "board":
+            return kind, "GET", f"/api/board/{rng.choice(self.players)}/", b""
+        if kind == "game-state":
+            return kind, "GET", "/api/game-state/", b""
+        if kind == "winners":
+            return kind, "GET", "/api/winners/", b""
+        scanner, target = rng.sample(self.players, 2)
+        body = json.dumps({"scanner_id": scanner, "target_id": target, "task_id": rng.choice(self.tasks)})
+        return kind, "POST", "/api/scan/", body.encode()
+
+    async def request(self, port, rng, slow_client):
+        kind, method, path, body = self.build_request(rng)
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode()
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            # Dribble the request in two halves, as a slow mobile client would
+            writer.write(head[: len(head) // 2])
+            await writer.drain()
+            await asyncio.sleep(slow_client)
+            writer.write(head[len(head) // 2 :] + body)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        status = int(response.split(b" ", 2)[1]) if response.startswith(b"HTTP/") else 0
+        return kind, status, time.perf_counter() - start
+
+    async def drive(self, port, options):
+        samples = []
+        slow_client = options["slow_client_ms"] / 1000
+        deadline = time.monotonic() + options["duration"]
+
+        async def client(seed):
+            rng = random.Random(seed)
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    samples.append(
+                        await asyncio.wait_for(self.request(port, rng, slow_client), options["timeout"])
+                    )
+                except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                    samples.append(("error", 0, time.perf_counter() - start))
+
+        started = time.monotonic()
+        await asyncio.gather(*(client(self.rng.random()) for _ in range(options["connections"])))
+        return samples, time.monotonic() - started
+
+    def summarize(self, samples, elapsed):
+        by_kind = {}
+        for kind, status, latency in samples:
+            by_kind.setdefault(kind, []).append((status, latency))
+
+        requests = {}
+        for kind, rows in sorted(by_kind.items()):
+            latencies = sorted(row[1] * 1000 for row in rows)
+            statuses = {}
+            for status, _ in rows:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            requests[kind] = {
+                "requests": len(rows),
+                "throughput_rps": round(len(rows) / elapsed, 2),
+                "statuses": statuses,
+                "p50_ms": round(_percentile(latencies, 50), 3),
+                "p95_ms": round(_percentile(latencies, 95), 3),
+                "p99_ms": round(_percentile(latencies, 99), 3),
+            }
+
+        answered = [latency for kind, status, latency in samples if kind != "error"]
+        return {
+            "duration_s": round(elapsed, 3),
+            "requests": len(answered),
+            "errors": len(samples) - len(answered),
+            "throughput_rps": round(len(answered) / elapsed, 2),
+            "endpoints": requests,
+        }
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from game.exports import CONTENT_TYPES, EXPORTS, iter_export
+
+
+class Command(BaseCommand):
+    help = "Dump every scan, winner or player as CSV or NDJSON, streaming rows from the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=sorted(CONTENT_TYPES), default="csv")
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output; requires --output.")
+        parser.add_argument("--output", help="File to write instead of stdout.")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows fetched per database round trip.")
+
+    def handle(self, *args, **options):
+        if options["gzip"] and not options["output"]:
+            raise CommandError("--gzip needs --output.")
+
+        chunks = iter_export(
+            options["name"], options["format"], compress=options["gzip"], chunk_size=options["chunk_size"]
+        )
+        if not options["output"]:
+            # Chunks always end on a line boundary
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending="")
+            return
+
+        written = 0
+        with open(options["output"], "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}."))
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from game import scan_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Flush queued scans from the local journal to the database, replaying anything "
+        "a crashed process left unflushed; with --follow, keep running as the host's writer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--follow", action="store_true", help="Keep flushing new scans as they are queued.")
+        parser.add_argument("--batch-size", type=int, default=None, help="Scans written per transaction.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"] or settings.SCAN_QUEUE_BATCH_SIZE
+        total = self.drain(batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Flushed {total} queued scans."))
+
+        while options["follow"]:
+            time.sleep(settings.SCAN_QUEUE_FLUSH_INTERVAL)
+            close_old_connections()
+            if flushed := self.drain(batch_size):
+                self.stdout.write(f"Flushed {flushed} queued scans.")
+
+    def drain(self, batch_size):
+        total = 0
+        while flushed := scan_queue.flush(batch_size):
+            total += flushed
+        return total
@@ -0,0 +1,130 @@
+import base64
+import csv
+import html
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game import qr
+from game.board import generate_layout
+from game.models import DEFAULT_GAME_SLUG, GameState, Player
+from game.serializers import normalize_phone
+
+SHEET_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Bingo player QR codes</title>
+<style>
+  body { font-family: sans-serif; margin: 0; }
+  .sheet { display: grid; grid-template-columns: repeat(4, 1fr); gap: 8mm; padding: 10mm; }
+  .card { text-align: center; page-break-inside: avoid; border: 1px dashed #aaa; padding: 4mm; }
+  .card img { width: 40mm; height: 40mm; }
+  .name { font-weight: bold; margin-top: 2mm; }
+</style>
+</head>
+<body>
+<div class="sheet">
+"""
+
+SHEET_FOOTER = """</div>
+</body>
+</html>
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-register players from a CSV with 'name' and 'phone' columns, "
+        "optionally rendering their QR codes and a printable QR sheet"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="CSV file with a header row containing 'name' and 'phone'.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows inserted per bulk_create.")
+        parser.add_argument("--render-qr", action="store_true", help="Render QR codes into the shared QR cache.")
+        parser.add_argument("--sheet", help="Write a printable HTML sheet of the imported players' QR codes here.")
+        parser.add_argument("--workers", type=int, default=None, help="Processes used to render QR codes.")
+        parser.add_argument("--game", default=DEFAULT_GAME_SLUG, help="Slug of the game to register players in.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        render = options["render_qr"] or options["sheet"]
+        try:
+            self.game = GameState.get_instance(options["game"])
+        except GameState.DoesNotExist:
+            raise CommandError(f"Game '{options['game']}' does not exist.")
+
+        # One query for every phone already registered; rows are deduped against it as they stream
+        seen_phones = set(Player.objects.filter(game=self.game).values_list("phone", flat=True))
+        stats = {"created": 0, "duplicate": 0, "invalid": 0}
+
+        sheet = open(options["sheet"], "w", encoding="utf-8") if options["sheet"] else None
+        pool = ProcessPoolExecutor(max_workers=options["workers"]) if render else None
+        try:
+            if sheet:
+                sheet.write(SHEET_HEADER)
+            with open(options["csv_path"], newline="", encoding="utf-8-sig") as f:
+                reader = csv.DictReader(f)
+                if not {"name", "phone"} <= set(reader.fieldnames or ()):
+                    raise CommandError("CSV must have 'name' and 'phone' columns.")
+
+                rows = self.players_from_rows(reader, seen_phones, stats)
+                while batch := list(islice(rows, batch_size)):
+                    Player.objects.bulk_create(batch, batch_size=batch_size)
+                    stats["created"] += len(batch)
+                    if render:
+                        self.render_batch(pool, batch, sheet)
+                    self.stdout.write(f"Imported {stats['created']} players...")
+            if sheet:
+                sheet.write(SHEET_FOOTER)
+        finally:
+            if pool:
+                pool.shutdown()
+            if sheet:
+                sheet.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {stats['created']} players "
+                f"({stats['duplicate']} duplicate phones, {stats['invalid']} invalid rows skipped)."
+            )
+        )
+
+    def players_from_rows(self, reader, seen_phones, stats):
+        for row in reader:
+            name = (row["name"] or "").strip()
+            phone = normalize_phone(row["phone"] or "")
+            if not name or phone is None:
+                stats["invalid"] += 1
+                self.stderr.write(f"Line {reader.line_num}: invalid name or phone, skipped.")
+                continue
+            if phone in seen_phones:
+                stats["duplicate"] += 1
+                continue
+            seen_phones.add(phone)
+
+            # bulk_create skips Player.save, so fix the board layout here
+            player_id = uuid.uuid4()
+            yield Player(
+                id=player_id,
+                game=self.game,
+                name=name[:100],
+                phone=phone,
+                board_layout=generate_layout(player_id),
+            )
+
+    def render_batch(self, pool, players, sheet):
+        ids = [str(player.id) for player in players]
+        for player, content in zip(players, pool.map(qr.render_png, ids, chunksize=64)):
+            qr.store_qr(player.id, content)
+            if sheet:
+                sheet.write(
+                    '<div class="card">'
+                    f'<img src="data:image/png;base64,{base64.b64encode(content).decode()}" alt="">'
+                    f'<div class="name">{html.escape(player.name)}</div>'
+                    f"<div>{player.phone[-4:].rjust(10, '•')}</div>"
+                    "</div>\n"
+                )
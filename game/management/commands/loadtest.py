@@ -0,0 +1,245 @@
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from game.catalog import bump_catalog_version
+from game.models import GameState
+
+# Relative weight of each action in the replayed traffic mix
+ACTION_WEIGHTS = {
+    "board": 30,
+    "game-state": 40,
+    "scan": 25,
+    "winners": 5,
+}
+SELF_SCAN_RATE = 0.05
+DUPLICATE_SCAN_RATE = 0.15
+
+
+class ClientTransport:
+    """Calls the API in-process through Django's test client, counting queries."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            # Count server errors as 500 samples instead of aborting the run
+            client = self._local.client = Client(raise_request_exception=False)
+        with CaptureQueriesContext(connection) as queries:
+            if method == "POST":
+                response = client.post(path, body, content_type="application/json")
+            else:
+                response = client.get(path)
+        data = response.json() if response.get("Content-Type", "").startswith("application/json") else None
+        return response.status_code, data, len(queries), len(response.content)
+
+
+class HTTPTransport:
+    """Calls a running server over HTTP. Query counts are not available."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, content = e.code, e.read()
+        try:
+            payload = json.loads(content)
+        except ValueError:
+            payload = None
+        return status, payload, None, len(content)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Register players and replay a realistic mix of board loads, game-state polls, "
+        "scans and winner fetches, then print throughput and latency as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Base URL of a running server, e.g. http://localhost:8000. "
+                            "Without it, requests go through the test client against a throwaway test database.")
+        parser.add_argument("--players", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--duration", type=float, default=30, help="Seconds to replay traffic for.")
+        parser.add_argument("--seed", type=int, default=None, help="Random seed for a repeatable mix.")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options["players"] < 2:
+            raise CommandError("--players must be at least 2 so players can scan each other.")
+        self.rng = random.Random(options["seed"])
+        self.samples = []
+        self.samples_lock = threading.Lock()
+
+        if options["url"]:
+            transport = HTTPTransport(options["url"] + "/api")
+            report = self.run(transport, options)
+        else:
+            report = self.run_in_test_database(options)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def run_in_test_database(self, options):
+        if connection.vendor == "sqlite":
+            # The default shared in-memory test database errors out on lock
+            # contention instead of waiting, so use a temporary file
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(), "loadtest.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        # Expected 4xx replies (duplicates, self-scans) would otherwise flood the log
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+        try:
+            call_command("seed_tasks", stdout=io.StringIO())
+            game = GameState.get_instance()
+            # Keep the game running for the whole replay
+            game.max_winners = options["players"] + 1
+            game.save()
+            return self.run(ClientTransport(), options, prefix="/api")
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            # Don't leave the throwaway database's state in the shared caches
+            GameState.invalidate_cache()
+            bump_catalog_version()
+
+    def call(self, transport, name, method, path, body=None):
+        start = time.perf_counter()
+        status, data, queries, size = transport.request(method, path, body)
+        elapsed = time.perf_counter() - start
+        with self.samples_lock:
+            self.samples.append((name, status, elapsed, queries, size))
+        return status, data
+
+    def run(self, transport, options, prefix=""):
+        players = []
+        for i in range(options["players"]):
+            status, data = self.call(
+                transport, "register", "POST", f"{prefix}/register/",
+                {"name": f"Load {i}", "phone": f"{7000000000 + i}"},
+            )
+            if status not in (200, 201):
+                raise CommandError(f"Registration failed with status {status}: {data}")
+            players.append(data["id"])
+
+        status, tasks = self.call(transport, "tasks", "GET", f"{prefix}/tasks/")
+        task_ids = [t["id"] for t in tasks]
+        if not task_ids:
+            raise CommandError("No tasks found; run seed_tasks first.")
+
+        completed = {}
+        completed_lock = threading.Lock()
+        deadline = time.monotonic() + options["duration"]
+        actions, weights = zip(*ACTION_WEIGHTS.items())
+
+        def scan(rng, player):
+            target = player if rng.random() < SELF_SCAN_RATE else rng.choice(players)
+            with completed_lock:
+                done = completed.setdefault(player, set())
+                if done and rng.random() < DUPLICATE_SCAN_RATE:
+                    task = rng.choice(sorted(done))
+                else:
+                    task = rng.choice(task_ids)
+            status, _ = self.call(
+                transport, "scan", "POST", f"{prefix}/scan/",
+                {"scanner_id": player, "target_id": target, "task_id": task},
+            )
+            if status == 201:
+                with completed_lock:
+                    completed[player].add(task)
+
+        def worker(worker_seed):
+            rng = random.Random(worker_seed)
+            try:
+                while time.monotonic() < deadline:
+                    player = rng.choice(players)
+                    action = rng.choices(actions, weights)[0]
+                    if action == "board":
+                        self.call(transport, action, "GET", f"{prefix}/board/{player}/")
+                    elif action == "game-state":
+                        self.call(transport, action, "GET", f"{prefix}/game-state/")
+                    elif action == "winners":
+                        self.call(transport, action, "GET", f"{prefix}/winners/")
+                    else:
+                        scan(rng, player)
+            finally:
+                connection.close()
+
+        self.samples.clear()
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            futures = [pool.submit(worker, self.rng.random()) for _ in range(options["concurrency"])]
+            for future in futures:
+                future.result()
+        elapsed = time.monotonic() - started
+
+        return self.summarize(options, elapsed)
+
+    def summarize(self, options, elapsed):
+        by_endpoint = {}
+        for name, status, latency, queries, size in self.samples:
+            by_endpoint.setdefault(name, []).append((status, latency, queries, size))
+
+        endpoints = {}
+        for name, rows in sorted(by_endpoint.items()):
+            latencies = sorted(row[1] * 1000 for row in rows)
+            query_counts = [row[2] for row in rows if row[2] is not None]
+            statuses = {}
+            for row in rows:
+                statuses[str(row[0])] = statuses.get(str(row[0]), 0) + 1
+            endpoints[name] = {
+                "requests": len(rows),
+                "throughput_rps": round(len(rows) / elapsed, 2),
+                "statuses": statuses,
+                "p50_ms": round(_percentile(latencies, 50), 3),
+                "p95_ms": round(_percentile(latencies, 95), 3),
+                "p99_ms": round(_percentile(latencies, 99), 3),
+                "mean_queries": round(sum(query_counts) / len(query_counts), 2) if query_counts else None,
+                "mean_bytes": round(sum(row[3] for row in rows) / len(rows), 1),
+            }
+
+        return {
+            "mode": "http" if options["url"] else "test-client",
+            "players": options["players"],
+            "concurrency": options["concurrency"],
+            "duration_s": round(elapsed, 3),
+            "requests": len(self.samples),
+            "throughput_rps": round(len(self.samples) / elapsed, 2),
+            "endpoints": endpoints,
+        }
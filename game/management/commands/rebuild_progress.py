@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from game.board import build_mask, count_cells, count_lines, generate_layout
+from game.models import Player, ScanRecord
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild every player's board completion mask and leaderboard scores "
+        "from their scan records, backfilling missing board layouts"
+    )
+
+    def handle(self, *args, **options):
+        positions = {}
+        last_scans = {}
+        rows = ScanRecord.objects.order_by().values_list("scanner_id", "task__position", "timestamp")
+        for scanner_id, position, timestamp in rows.iterator():
+            positions.setdefault(scanner_id, []).append(position)
+            last_scans[scanner_id] = max(timestamp, last_scans.get(scanner_id, timestamp))
+
+        fields = ["completed_mask", "board_layout", "cells_completed", "lines_completed", "last_progress_at"]
+        changed = []
+        players = Player.objects.only("id", *fields)
+        for player in players.iterator():
+            layout = bytes(player.board_layout) or generate_layout(player.id)
+            mask = build_mask(layout, positions.get(player.id, ()))
+            scores = (count_cells(mask), count_lines(mask), last_scans.get(player.id))
+            if (
+                mask != player.completed_mask
+                or not player.board_layout
+                or scores != (player.cells_completed, player.lines_completed, player.last_progress_at)
+            ):
+                player.board_layout = layout
+                player.completed_mask = mask
+                player.cells_completed, player.lines_completed, player.last_progress_at = scores
+                changed.append(player)
+
+        Player.objects.bulk_update(changed, fields, batch_size=500)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt board progress ({len(changed)} players changed)."))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from game.models import GameState, Winner
+
+
+class Command(BaseCommand):
+    help = "Recount winners into each game's GameState.winner_count and game_active after admin edits"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report the corrections without saving them.")
+
+    def handle(self, *args, **options):
+        if not options["dry_run"]:
+            GameState.get_instance()
+        for game_id in GameState.objects.order_by("pk").values_list("pk", flat=True):
+            self.reconcile(game_id, options["dry_run"])
+
+    def reconcile(self, game_id, dry_run):
+        with transaction.atomic():
+            gs = GameState.objects.select_for_update().get(pk=game_id)
+            actual = Winner.objects.filter(game=gs).count()
+            active = gs.game_active
+            if actual >= gs.max_winners:
+                active = False
+            elif gs.winner_count >= gs.max_winners:
+                # The game only ended because it filled up; it has open slots again
+                active = True
+
+            changes = []
+            if gs.winner_count != actual:
+                changes.append(f"winner count from {gs.winner_count} to {actual}")
+            if gs.game_active != active:
+                changes.append(f"game_active from {gs.game_active} to {active}")
+            if not changes:
+                self.stdout.write(self.style.SUCCESS(f"{gs.slug}: winner count is correct ({actual})."))
+                return
+
+            if not dry_run:
+                gs.winner_count = actual
+                gs.game_active = active
+                gs.save(update_fields=["winner_count", "game_active"])
+        verb = "would correct" if dry_run else "corrected"
+        self.stdout.write(self.style.SUCCESS(f"{gs.slug}: {verb} {' and '.join(changes)}."))
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 
-from game.models import GameState, Task
+from game.models import DEFAULT_GAME_SLUG, GameState, Task
 
 TASKS = [
     "Meet a Photographer",
@@ -32,18 +32,21 @@ TASKS = [
 
 
 class Command(BaseCommand):
-    help = "Seed the database with 25 bingo tasks and initialize game state"
+    help = "Seed a game with 25 bingo tasks and initialize its state, creating the game if needed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game", default=DEFAULT_GAME_SLUG, help="Slug of the game to seed.")
 
     def handle(self, *args, **options):
-        if Task.objects.exists():
+        gs, _ = GameState.objects.get_or_create(slug=options["game"])
+        if Task.objects.filter(game=gs).exists():
             self.stdout.write(self.style.WARNING("Tasks already exist — skipping seed."))
         else:
             for i, desc in enumerate(TASKS):
-                Task.objects.create(description=desc, position=i)
+                Task.objects.create(game=gs, description=desc, position=i)
             self.stdout.write(self.style.SUCCESS(f"Created {len(TASKS)} tasks."))
 
-        gs = GameState.get_instance()
-        if gs.max_winners != 10:
-            gs.max_winners = 10
-            gs.save()
+        # Always save so cached copies pick up the reseeded game
+        gs.max_winners = 10
+        gs.save()
         self.stdout.write(self.style.SUCCESS("Game state initialized (max_winners=10)."))
@@ -0,0 +1,208 @@
+import logging
+import time
+from contextvars import ContextVar
+from threading import Lock
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class ViewStats:
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_duration = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+    def record(self, duration, queries, db_duration, response_bytes, status):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.count += 1
+        self.duration += duration
+        self.queries += queries
+        self.db_duration += db_duration
+        self.response_bytes += response_bytes
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+
+class Registry:
+    """In-process aggregate of per-view request metrics."""
+
+    def __init__(self):
+        self._views = {}
+        self._lock = Lock()
+
+    def record(self, view, **sample):
+        with self._lock:
+            self._views.setdefault(view, ViewStats()).record(**sample)
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """Render the collected metrics in the Prometheus text exposition format."""
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                "# HELP bingo_request_duration_seconds Request latency by view.",
+                "# TYPE bingo_request_duration_seconds histogram",
+            ]
+            for view, stats in views:
+                cumulative = 0
+                for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), stats.buckets):
+                    cumulative += count
+                    lines.append(f'bingo_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+                lines.append(f'bingo_request_duration_seconds_sum{{view="{view}"}} {stats.duration:.6f}')
+                lines.append(f'bingo_request_duration_seconds_count{{view="{view}"}} {stats.count}')
+
+            counters = [
+                ("bingo_db_queries_total", "Database queries executed by view.", "queries", "d"),
+                ("bingo_db_duration_seconds_total", "Time spent in the database by view.", "db_duration", ".6f"),
+                ("bingo_response_bytes_total", "Response body bytes by view.", "response_bytes", "d"),
+            ]
+            for name, help_text, attr, fmt in counters:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for view, stats in views:
+                    lines.append(f'{name}{{view="{view}"}} {getattr(stats, attr):{fmt}}')
+
+            lines.append("# HELP bingo_requests_total Responses by view and status code.")
+            lines.append("# TYPE bingo_requests_total counter")
+            for view, stats in views:
+                for code, count in sorted(stats.statuses.items()):
+                    lines.append(f'bingo_requests_total{{view="{view}",status="{code}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class _QueryRecorder:
+    """Times every query run while it is the active recorder."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+
+# The recorder of the request being handled. Context variables follow a
+# request into the threads that run its sync code, which is where the async
+# ORM executes queries on a different connection than the event loop's.
+_active_recorder = ContextVar("metrics_query_recorder", default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _active_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install_query_recording(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_query_recording)
+
+
+def _game_view_names():
+    from . import urls
+
+    names = {getattr(pattern, "name", None) for pattern in urls.urlpatterns}
+    return names - {None, "metrics"}
+
+
+class MetricsMiddleware:
+    """Record latency, DB queries/time and response size for each game API view.
+
+    Requests slower than ``METRICS_SLOW_REQUEST_MS`` are logged with their SQL.
+    Works under WSGI and ASGI without forcing async views into a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_threshold = settings.METRICS_SLOW_REQUEST_MS / 1000
+        self.view_names = None
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        # Connections opened before this module was imported missed the signal
+        _install_query_recording(connection)
+        recorder = _QueryRecorder()
+        token = _active_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _active_recorder.reset(token)
+        self.record(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        recorder = _QueryRecorder()
+        token = _active_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _active_recorder.reset(token)
+        self.record(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, recorder, duration):
+        if self.view_names is None:
+            self.view_names = _game_view_names()
+        match = request.resolver_match
+        if match is None or match.url_name not in self.view_names:
+            return
+
+        db_duration = sum(elapsed for _, elapsed in recorder.queries)
+        registry.record(
+            match.url_name,
+            duration=duration,
+            queries=len(recorder.queries),
+            db_duration=db_duration,
+            response_bytes=0 if response.streaming else len(response.content),
+            status=response.status_code,
+        )
+
+        if duration > self.slow_threshold:
+            logger.warning(
+                "Slow request %s %s (view %s): %.1f ms, %d queries taking %.1f ms\n%s",
+                request.method,
+                request.path,
+                match.url_name,
+                duration * 1000,
+                len(recorder.queries),
+                db_duration * 1000,
+                "\n".join(f"  [{elapsed * 1000:.1f} ms] {sql}" for sql, elapsed in recorder.queries),
+            )
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:27
+
+from django.db import migrations, models
+
+from game.board import build_mask, generate_layout
+
+
+def backfill_completed_masks(apps, schema_editor):
+    Player = apps.get_model('game', 'Player')
+    ScanRecord = apps.get_model('game', 'ScanRecord')
+
+    positions = {}
+    rows = ScanRecord.objects.order_by().values_list('scanner_id', 'task__position')
+    for scanner_id, position in rows.iterator():
+        positions.setdefault(scanner_id, []).append(position)
+
+    players = []
+    for player in Player.objects.only('id').iterator():
+        player.completed_mask = build_mask(generate_layout(player.id), positions.get(player.id, ()))
+        players.append(player)
+    Player.objects.bulk_update(players, ['completed_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0002_gamestate_allow_duplicate_scans'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='completed_mask',
+            field=models.IntegerField(default=0, editable=False, help_text='Bit i is set when display cell i is completed.'),
+        ),
+        migrations.RunPython(backfill_completed_masks, migrations.RunPython.noop),
+    ]
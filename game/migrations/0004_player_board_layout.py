@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:27
+
+from django.db import migrations, models
+
+from game.board import generate_layout
+
+
+def backfill_board_layouts(apps, schema_editor):
+    Player = apps.get_model('game', 'Player')
+    players = []
+    for player in Player.objects.only('id').iterator():
+        player.board_layout = generate_layout(player.id)
+        players.append(player)
+    Player.objects.bulk_update(players, ['board_layout'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0003_player_completed_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='board_layout',
+            field=models.BinaryField(default=b'', help_text='Byte i is the display cell of the task at position i.', max_length=25),
+        ),
+        migrations.RunPython(backfill_board_layouts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0004_player_board_layout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamestate',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Incremented on every save; used to invalidate cached copies.'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:34
+
+from django.db import migrations, models
+
+
+def backfill_winner_count(apps, schema_editor):
+    GameState = apps.get_model('game', 'GameState')
+    Winner = apps.get_model('game', 'Winner')
+    GameState.objects.update(winner_count=Winner.objects.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0005_gamestate_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamestate',
+            name='winner_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of Winner rows, maintained by submit_scan. Fix drift with reconcile_winners.'),
+        ),
+        migrations.RunPython(backfill_winner_count, migrations.RunPython.noop),
+    ]
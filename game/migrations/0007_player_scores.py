@@ -0,0 +1,51 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:41
+
+from django.db import migrations, models
+from django.db.models import Max
+
+from game.board import count_cells, count_lines
+
+
+def backfill_scores(apps, schema_editor):
+    Player = apps.get_model('game', 'Player')
+
+    players = []
+    rows = Player.objects.filter(completed_mask__gt=0).annotate(last_scan=Max('scans_made__timestamp'))
+    for player in rows.only('id', 'completed_mask').iterator():
+        player.cells_completed = count_cells(player.completed_mask)
+        player.lines_completed = count_lines(player.completed_mask)
+        player.last_progress_at = player.last_scan
+        players.append(player)
+    Player.objects.bulk_update(
+        players, ['cells_completed', 'lines_completed', 'last_progress_at'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0006_gamestate_winner_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='cells_completed',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='last_progress_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='lines_completed',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['-lines_completed', '-cells_completed', 'last_progress_at'], name='player_leaderboard_idx'),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
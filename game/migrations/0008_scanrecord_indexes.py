@@ -0,0 +1,21 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0007_player_scores'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scanrecord',
+            index=models.Index(fields=['scanner', 'target', 'task'], name='scan_scanner_target_task_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scanrecord',
+            index=models.Index(fields=['verification_status', '-timestamp'], name='scan_status_time_idx'),
+        ),
+    ]
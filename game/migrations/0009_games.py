@@ -0,0 +1,60 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_default_game(apps, schema_editor):
+    GameState = apps.get_model('game', 'GameState')
+
+    # The old singleton row becomes the default game
+    game = GameState.objects.order_by('pk').first()
+    if game is None:
+        game = GameState.objects.create(slug='main')
+    for model_name in ('Player', 'Task', 'ScanRecord', 'Winner'):
+        apps.get_model('game', model_name).objects.filter(game__isnull=True).update(game=game)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0008_scanrecord_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='gamestate',
+            options={'verbose_name': 'Game', 'verbose_name_plural': 'Games'},
+        ),
+        migrations.AddField(
+            model_name='gamestate',
+            name='name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='gamestate',
+            name='slug',
+            field=models.SlugField(default='main'),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='game',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='players', to='game.gamestate'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='game',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='game.gamestate'),
+        ),
+        migrations.AddField(
+            model_name='scanrecord',
+            name='game',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scans', to='game.gamestate'),
+        ),
+        migrations.AddField(
+            model_name='winner',
+            name='game',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='winners', to='game.gamestate'),
+        ),
+        migrations.RunPython(backfill_default_game, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0009_games'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gamestate',
+            name='slug',
+            field=models.SlugField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='player',
+            name='game',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='players', to='game.gamestate'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='game',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='game.gamestate'),
+        ),
+        migrations.AlterField(
+            model_name='scanrecord',
+            name='game',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scans', to='game.gamestate'),
+        ),
+        migrations.AlterField(
+            model_name='winner',
+            name='game',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='winners', to='game.gamestate'),
+        ),
+        migrations.AlterField(
+            model_name='player',
+            name='phone',
+            field=models.CharField(max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='position',
+            field=models.IntegerField(help_text='Grid position 0-24 (left-to-right, top-to-bottom).'),
+        ),
+        migrations.AddConstraint(
+            model_name='player',
+            constraint=models.UniqueConstraint(fields=('game', 'phone'), name='player_unique_phone_per_game'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(fields=('game', 'position'), name='task_unique_position_per_game'),
+        ),
+        migrations.RemoveIndex(
+            model_name='player',
+            name='player_leaderboard_idx',
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['game', '-lines_completed', '-cells_completed', 'last_progress_at'], name='player_leaderboard_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='scanrecord',
+            name='scan_status_time_idx',
+        ),
+        migrations.AddIndex(
+            model_name='scanrecord',
+            index=models.Index(fields=['game', 'verification_status', '-timestamp'], name='scan_game_status_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='winner',
+            index=models.Index(fields=['game', 'won_at'], name='winner_game_won_at_idx'),
+        ),
+    ]
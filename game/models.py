@@ -1,32 +1,77 @@
+import time
 import uuid
 
-from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+
+from .board import generate_layout
+
+# Slug of the game served by the unprefixed /api/ routes
+DEFAULT_GAME_SLUG = "main"
 
 
 class Player(models.Model):
-    """A participant in the bingo game."""
+    """A participant in one game."""
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    game = models.ForeignKey("GameState", on_delete=models.CASCADE, related_name="players")
     name = models.CharField(max_length=100)
-    phone = models.CharField(max_length=20, unique=True)
+    phone = models.CharField(max_length=20)
     qr_code = models.ImageField(upload_to="qrcodes/", blank=True)
+    completed_mask = models.IntegerField(
+        default=0,
+        editable=False,
+        help_text="Bit i is set when display cell i is completed.",
+    )
+    board_layout = models.BinaryField(
+        max_length=25,
+        default=b"",
+        help_text="Byte i is the display cell of the task at position i.",
+    )
+    # Leaderboard scores, derived from completed_mask by submit_scan
+    cells_completed = models.PositiveSmallIntegerField(default=0, editable=False)
+    lines_completed = models.PositiveSmallIntegerField(default=0, editable=False)
+    last_progress_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["game", "phone"], name="player_unique_phone_per_game"),
+        ]
+        indexes = [
+            # Top-N leaderboard: most lines, then most cells, earliest to get there
+            models.Index(
+                fields=["game", "-lines_completed", "-cells_completed", "last_progress_at"],
+                name="player_leaderboard_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The board permutation is fixed at registration
+        if not self.board_layout:
+            self.board_layout = generate_layout(self.id)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
 
 class Task(models.Model):
-    """A bingo task that appears on the board."""
+    """A bingo task that appears on one game's board."""
 
+    game = models.ForeignKey("GameState", on_delete=models.CASCADE, related_name="tasks")
     description = models.CharField(max_length=200)
     position = models.IntegerField(
-        unique=True,
         help_text="Grid position 0-24 (left-to-right, top-to-bottom).",
     )
 
     class Meta:
         ordering = ["position"]
+        constraints = [
+            models.UniqueConstraint(fields=["game", "position"], name="task_unique_position_per_game"),
+        ]
 
     def __str__(self):
         return f"[{self.position}] {self.description}"
@@ -40,6 +85,7 @@ class ScanRecord(models.Model):
         APPROVED = "approved", "Approved"
         REJECTED = "rejected", "Rejected"
 
+    game = models.ForeignKey("GameState", on_delete=models.CASCADE, related_name="scans")
     scanner = models.ForeignKey(
         Player, on_delete=models.CASCADE, related_name="scans_made"
     )
@@ -57,38 +103,133 @@ class ScanRecord(models.Model):
     class Meta:
         unique_together = ("scanner", "task")
         ordering = ["-timestamp"]
+        indexes = [
+            # The duplicate-target check and the batch prefetch of a scanner's
+            # (target, task) pairs are both answered from this index alone
+            models.Index(fields=["scanner", "target", "task"], name="scan_scanner_target_task_idx"),
+            # Admin changelist filtered by game and status, newest first
+            models.Index(
+                fields=["game", "verification_status", "-timestamp"], name="scan_game_status_time_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.scanner.name} scanned {self.target.name} for '{self.task.description}'"
 
 
+# slug -> (instance, expiry) of this process's cached games
+_game_state_memo = {}
+
+
+def _game_state_cache_key(slug):
+    return f"game-state:{slug}"
+
+
 class GameState(models.Model):
-    """Singleton model tracking the overall game state."""
+    """One game (an event or a round) with its own tasks, players and settings.
 
+    The unprefixed API routes serve the game with ``DEFAULT_GAME_SLUG``;
+    others are served under ``/api/games/<slug>/``.
+    """
+
+    slug = models.SlugField(unique=True)
+    name = models.CharField(max_length=100, blank=True)
     game_active = models.BooleanField(default=True)
     max_winners = models.IntegerField(default=10)
     allow_duplicate_scans = models.BooleanField(
         default=False,
         help_text="Allow a player to scan the same person more than once (for different tasks).",
     )
+    winner_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of Winner rows, maintained by submit_scan. Fix drift with reconcile_winners.",
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Incremented on every save; used to invalidate cached copies.",
+    )
 
     class Meta:
-        verbose_name = "Game State"
-        verbose_name_plural = "Game State"
+        verbose_name = "Game"
+        verbose_name_plural = "Games"
 
     def save(self, *args, **kwargs):
-        # Enforce singleton — always use pk=1
-        self.pk = 1
+        adding = self._state.adding
+        # Incremented by the database, so concurrent saves never share a version
+        self.version = 1 if adding else models.F("version") + 1
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
         super().save(*args, **kwargs)
+        if not adding:
+            self.refresh_from_db(fields=["version"])
+        # Drop now so this connection reads its own write, and again on commit
+        # in case another worker re-cached the old row in between
+        slug = self.slug
+        GameState.invalidate_cache(slug)
+        transaction.on_commit(lambda: GameState.invalidate_cache(slug))
+
+    @classmethod
+    def get_instance(cls, slug=DEFAULT_GAME_SLUG):
+        """Return a game by slug, creating the default game on first use.
+
+        Raises ``GameState.DoesNotExist`` for an unknown slug.
+        """
+        if slug == DEFAULT_GAME_SLUG:
+            obj, _ = cls.objects.get_or_create(slug=slug)
+            return obj
+        # Always the primary: the result fills the shared cache
+        return cls.objects.using(DEFAULT_DB_ALIAS).get(slug=slug)
+
+    @classmethod
+    def get_cached(cls, slug=DEFAULT_GAME_SLUG):
+        """Return a game from cache, for read paths that tolerate brief staleness.
+
+        Each process keeps its copy for ``GAME_STATE_CACHE_TTL`` seconds before
+        re-reading the shared cache, which is refilled from the database after
+        every save. Do not save the returned instance.
+        """
+        instance, expires = _game_state_memo.get(slug, (None, 0))
+        now = time.monotonic()
+        if instance is not None and now < expires:
+            return instance
+
+        key = _game_state_cache_key(slug)
+        instance = cache.get(key)
+        if instance is None:
+            instance = cls.get_instance(slug)
+            cache.add(key, instance)
+        _game_state_memo[slug] = (instance, now + settings.GAME_STATE_CACHE_TTL)
+        return instance
+
+    @classmethod
+    async def aget_cached(cls, slug=DEFAULT_GAME_SLUG):
+        """Async version of ``get_cached``."""
+        instance, expires = _game_state_memo.get(slug, (None, 0))
+        now = time.monotonic()
+        if instance is not None and now < expires:
+            return instance
+
+        key = _game_state_cache_key(slug)
+        instance = await cache.aget(key)
+        if instance is None:
+            if slug == DEFAULT_GAME_SLUG:
+                instance, _ = await cls.objects.aget_or_create(slug=slug)
+            else:
+                instance = await cls.objects.using(DEFAULT_DB_ALIAS).aget(slug=slug)
+            await cache.aadd(key, instance)
+        _game_state_memo[slug] = (instance, now + settings.GAME_STATE_CACHE_TTL)
+        return instance
 
     @classmethod
-    def get_instance(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
-        return obj
+    def invalidate_cache(cls, slug=DEFAULT_GAME_SLUG):
+        _game_state_memo.pop(slug, None)
+        cache.delete(_game_state_cache_key(slug))
 
     def __str__(self):
         status = "Active" if self.game_active else "Ended"
-        return f"Game is {status}"
+        return f"{self.name or self.slug} ({status})"
 
 
 class Winner(models.Model):
@@ -100,12 +241,42 @@ class Winner(models.Model):
         DIAGONAL = "diagonal", "Diagonal"
         FULL = "full", "Full Board"
 
+    game = models.ForeignKey(GameState, on_delete=models.CASCADE, related_name="winners")
     player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="wins")
     win_type = models.CharField(max_length=10, choices=WinType.choices)
     won_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["won_at"]
+        indexes = [
+            models.Index(fields=["game", "won_at"], name="winner_game_won_at_idx"),
+        ]
 
     def __str__(self):
         return f"{self.player.name} won with {self.get_win_type_display()}"
+
+
+class IdempotencyRecord(models.Model):
+    """The response to a scan sent with an ``Idempotency-Key``, kept to answer its retries.
+
+    The unique constraint makes claiming a key a single atomic insert.
+    ``status_code`` stays empty while the claiming request is still running.
+    """
+
+    scanner_id = models.UUIDField()
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scanner_id", "key"], name="idempotency_unique_key_per_scanner"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="idempotency_expires_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.scanner_id})"
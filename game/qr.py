@@ -0,0 +1,131 @@
+import base64
+import hashlib
+import io
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+from django.core.cache import caches
+
+# Bump when the rendering parameters change so cached images are regenerated.
+QR_RENDER_VERSION = 1
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+QRImage = namedtuple("QRImage", ["content", "content_type", "etag"])
+
+
+def _build_qr(player_id, **kwargs):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=2,
+        **kwargs,
+    )
+    qr.add_data(str(player_id))
+    qr.make(fit=True)
+    return qr
+
+
+def render_png(player_id):
+    """Render a player's QR code as PNG bytes."""
+    img = _build_qr(player_id).make_image(fill_color="black", back_color="white")
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def render_svg(player_id):
+    """Render a player's QR code as SVG bytes."""
+    img = _build_qr(player_id, image_factory=qrcode.image.svg.SvgPathImage).make_image()
+    buf = io.BytesIO()
+    img.save(buf)
+    return buf.getvalue()
+
+
+_RENDERERS = {
+    "png": render_png,
+    "svg": render_svg,
+}
+
+
+class _LRU:
+    """Small thread-safe LRU used in front of the shared QR cache."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_memory = _LRU(getattr(settings, "QR_MEMORY_CACHE_SIZE", 512))
+
+
+def _shared_cache():
+    return caches[getattr(settings, "QR_CACHE_ALIAS", "default")]
+
+
+def _cache_key(player_id, fmt):
+    return f"qr:v{QR_RENDER_VERSION}:{fmt}:{player_id}"
+
+
+def store_qr(player_id, content, fmt="png"):
+    """Put an already rendered QR image into the shared cache, e.g. from a bulk import."""
+    _shared_cache().set(_cache_key(player_id, fmt), content, timeout=None)
+
+
+def get_qr(player_id, fmt="png"):
+    """Return the cached QR image for a player, rendering it on first use.
+
+    Lookups go through a per-process LRU first, then the shared cache
+    configured by ``QR_CACHE_ALIAS`` so every worker reuses the same render.
+    """
+    key = _cache_key(player_id, fmt)
+    image = _memory.get(key)
+    if image is not None:
+        return image
+
+    shared = _shared_cache()
+    content = shared.get(key)
+    if content is None:
+        content = _RENDERERS[fmt](player_id)
+        shared.set(key, content, timeout=None)
+
+    image = QRImage(
+        content=content,
+        content_type=CONTENT_TYPES[fmt],
+        etag=f'"{hashlib.sha256(content).hexdigest()[:32]}"',
+    )
+    _memory.set(key, image)
+    return image
+
+
+def get_qr_dataurl(player_id):
+    """Return a player's QR code as a PNG data URL."""
+    content = get_qr(player_id, "png").content
+    return f"data:image/png;base64,{base64.b64encode(content).decode()}"
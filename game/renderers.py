@@ -0,0 +1,28 @@
+"""Fast JSON output with orjson, shared by the DRF views and the async views."""
+
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_fallback = JSONEncoder()
+
+# UTC datetimes end in "Z", as DRF's own encoder writes them
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(data):
+    """Serialize to compact UTF-8 JSON bytes; types orjson doesn't know go through DRF's encoder."""
+    return orjson.dumps(data, default=_fallback.default, option=_OPTIONS)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Drop-in replacement for DRF's ``JSONRenderer`` that renders with orjson."""
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return dumps(data)
@@ -0,0 +1,95 @@
+"""Send the reads of read-only API views to a replica when one is configured.
+
+Views wrapped in ``reads_from_replica`` run with the ``replica`` alias as
+their read database; everything else, including every write and every read
+inside a write view, stays on ``default``. A player who just wrote is pinned
+to the primary for ``REPLICA_PIN_SECONDS`` so their next board or bootstrap
+request sees the change even while the replica lags.
+"""
+
+import contextvars
+import functools
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = "replica"
+
+# Database the current request reads from; None means the default
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def read_db():
+    """Return the alias bulk reads should use: the replica if configured, else the primary."""
+    return REPLICA_DB_ALIAS if replica_configured() else DEFAULT_DB_ALIAS
+
+
+def _pin_key(player_id):
+    return f"primary-pin:{player_id}"
+
+
+def _pins():
+    return caches[settings.REPLICA_PIN_CACHE_ALIAS]
+
+
+def pin_to_primary(player_id):
+    """Keep a player's reads on the primary until the replica has caught up with their write."""
+    if replica_configured():
+        _pins().set(_pin_key(player_id), True, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def _alias_for(pinned):
+    return None if pinned or not replica_configured() else REPLICA_DB_ALIAS
+
+
+def reads_from_replica(view):
+    """Route a read-only view's queries to the replica, unless its player is pinned."""
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            player_id = kwargs.get("player_id")
+            pinned = (
+                replica_configured()
+                and player_id is not None
+                and await _pins().aget(_pin_key(player_id))
+            )
+            token = _read_alias.set(_alias_for(pinned))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+
+    else:
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            player_id = kwargs.get("player_id")
+            pinned = replica_configured() and player_id is not None and _pins().get(_pin_key(player_id))
+            token = _read_alias.set(_alias_for(pinned))
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """Reads go where the current view says; writes always go to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
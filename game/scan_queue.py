@@ -0,0 +1,384 @@
+"""Write-behind scan ingestion for rushes of scans.
+
+With ``SCAN_INGESTION = "queued"``, ``submit_scan`` checks a scan against
+player and progress state cached in the process, appends it to an SQLite
+journal at ``SCAN_QUEUE_PATH`` and answers 202 straight away. A writer
+thread then flushes the journal to ``ScanRecord`` in batches. It updates
+each scanner's progress and settles winners in journal order, then moves a
+checkpoint forward. Only one writer on a host flushes at a time.
+``submit_scan_batch`` queues each of its items the same way.
+
+Each append is committed to the journal before the scan is acknowledged.
+Entries past the checkpoint are replayed by the next flush, whether that
+comes from this process after a restart or from ``flush_scan_queue``.
+Replaying is safe because the scan insert skips rows that already exist,
+the progress update ORs bits in, and a player wins at most once. Entries
+whose game, players or task were deleted before the flush are dropped with
+a warning, so they can't fail every later flush and hold the checkpoint back.
+
+The journal is local to one host. It is also the record of which tasks
+and targets a scanner used since the process cached their history, so
+keep it for the whole event. Scans saved by the synchronous path call
+``forget`` so this process reloads that scanner. Scan timestamps are set
+when the scan is flushed, not when it was received.
+"""
+
+import fcntl
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from rest_framework import status
+
+from .board import LINES_TO_WIN, cell_bit, count_lines, get_layout
+from .catalog import get_catalog
+from .models import GameState, Player, ScanRecord, Task
+from .routers import pin_to_primary
+from .serializers import ScanRecordSerializer
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_id INTEGER NOT NULL,
+    scanner_id TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    UNIQUE (scanner_id, task_id)
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    seq INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO checkpoint VALUES (1, 0);
+"""
+
+# Cached players are dropped wholesale past this many, then reloaded on demand
+MAX_CACHED_PLAYERS = 20000
+
+# A scanner's tasks and targets in the database when the process first saw them
+History = namedtuple("History", ["tasks", "targets"])
+
+_local = threading.local()
+_players = {}
+_histories = {}
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _connection():
+    """Return this thread's connection to the journal, creating the file on first use."""
+    path = settings.SCAN_QUEUE_PATH
+    conn = getattr(_local, "connections", {}).get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Commit only once the append is on disk
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(SCHEMA)
+        _local.connections = {**getattr(_local, "connections", {}), path: conn}
+    return conn
+
+
+def clear_cache():
+    """Forget the cached players and scan histories, e.g. after the database was reset."""
+    _players.clear()
+    _histories.clear()
+
+
+def forget(player_id):
+    """Drop a player's cached state after their scans were written outside the journal."""
+    _players.pop(player_id, None)
+    _histories.pop(player_id, None)
+
+
+def _cached_players(ids):
+    """Return the players with the given ids, loading the uncached ones with one query."""
+    missing = [player_id for player_id in ids if player_id not in _players]
+    if missing:
+        if len(_players) > MAX_CACHED_PLAYERS:
+            _players.clear()
+            _histories.clear()
+        for player in Player.objects.filter(id__in=missing).only(
+            "id", "game", "name", "completed_mask", "board_layout"
+        ):
+            _players[player.id] = player
+    return {player_id: _players[player_id] for player_id in ids if player_id in _players}
+
+
+def _cached_history(scanner_id):
+    history = _histories.get(scanner_id)
+    if history is None:
+        tasks, targets = set(), set()
+        for task_id, target_id in ScanRecord.objects.filter(scanner_id=scanner_id).order_by().values_list(
+            "task_id", "target_id"
+        ):
+            tasks.add(task_id)
+            targets.add(str(target_id))
+        history = _histories[scanner_id] = History(tasks, targets)
+    return history
+
+
+def _progress_mask(scanner, catalog, tasks):
+    """Return a scanner's stored mask with the cells of ``tasks`` added."""
+    layout = get_layout(scanner)
+    mask = scanner.completed_mask
+    for task_id in tasks:
+        if task_id in catalog.by_id:
+            mask |= cell_bit(layout, catalog.by_id[task_id].position)
+    return mask
+
+
+def _queued_scans(conn, scanner_id):
+    return conn.execute(
+        "SELECT task_id, target_id FROM scans WHERE scanner_id = ?", (str(scanner_id),)
+    ).fetchall()
+
+
+def submit(game, scanner_id, target_id, task_id):
+    """Validate a scan and append it to the journal; returns the response ``(body, status)``.
+
+    The body matches ``submit_scan``'s, except that ``new_win`` is only
+    known once the scan is flushed. ``win_pending`` says whether this scan
+    completed the scanner's fifth line.
+    """
+    ensure_writer()
+    players = _cached_players([scanner_id, target_id])
+    scanner = players.get(scanner_id)
+    if scanner is None or scanner.game_id != game.pk:
+        return {"error": "Scanner not found"}, status.HTTP_404_NOT_FOUND
+    target = players.get(target_id)
+    if target is None or target.game_id != game.pk:
+        return {"error": "Target player not found"}, status.HTTP_404_NOT_FOUND
+
+    catalog = get_catalog(game.pk)
+    task = catalog.by_id.get(task_id)
+    if task is None:
+        return {"error": "Task not found"}, status.HTTP_404_NOT_FOUND
+
+    history = _cached_history(scanner_id)
+    conn = _connection()
+    # Serialize appends across processes so the checks below stay true until commit
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        queued = _queued_scans(conn, scanner_id)
+        tasks = history.tasks | {row[0] for row in queued}
+        targets = history.targets | {row[1] for row in queued}
+        if not game.allow_duplicate_scans and str(target_id) in targets:
+            conn.execute("ROLLBACK")
+            return {"error": "You already scanned this person"}, status.HTTP_409_CONFLICT
+        if task.id in tasks:
+            conn.execute("ROLLBACK")
+            return {"error": "You already completed this task"}, status.HTTP_409_CONFLICT
+        conn.execute(
+            "INSERT INTO scans (game_id, scanner_id, target_id, task_id) VALUES (?, ?, ?, ?)",
+            (game.pk, str(scanner_id), str(target_id), task.id),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+    previous_mask = _progress_mask(scanner, catalog, tasks)
+    mask = previous_mask | cell_bit(get_layout(scanner), task.position)
+
+    scan = ScanRecord(game=game, scanner=scanner, target=target, task=task)
+    completed_lines = count_lines(mask)
+    return {
+        "scan": ScanRecordSerializer(scan).data,
+        "completed_lines": completed_lines,
+        "lines_to_win": LINES_TO_WIN,
+        "new_win": False,
+        "win_pending": count_lines(previous_mask) < LINES_TO_WIN <= completed_lines,
+        "game_active": game.game_active,
+        "queued": True,
+    }, status.HTTP_202_ACCEPTED
+
+
+def submit_batch(game, scanner_id, items):
+    """Queue an ordered list of scans for one scanner; returns the response ``(body, status)``.
+
+    Each item is checked against the database and the journal and appended
+    as ``submit`` would, so its result has status 202 or ``submit``'s error.
+    The body matches ``submit_scan_batch``'s, plus ``win_pending``.
+    """
+    scanner = _cached_players([scanner_id]).get(scanner_id)
+    if scanner is None or scanner.game_id != game.pk:
+        return {"error": "Scanner not found"}, status.HTTP_404_NOT_FOUND
+
+    results = []
+    win_pending = False
+    for item in items:
+        if item["target_id"] == scanner_id:
+            results.append({"status": status.HTTP_400_BAD_REQUEST, "error": "You cannot scan your own QR code"})
+            continue
+        body, code = submit(game, scanner_id, item["target_id"], item["task_id"])
+        if code == status.HTTP_202_ACCEPTED:
+            results.append({"status": code, "scan": body["scan"]})
+            win_pending = win_pending or body["win_pending"]
+        else:
+            results.append({"status": code, "error": body["error"]})
+
+    catalog = get_catalog(game.pk)
+    tasks = _cached_history(scanner_id).tasks | {row[0] for row in _queued_scans(_connection(), scanner_id)}
+    return {
+        "results": results,
+        "completed_lines": count_lines(_progress_mask(scanner, catalog, tasks)),
+        "lines_to_win": LINES_TO_WIN,
+        "new_win": False,
+        "win_pending": win_pending,
+        "game_active": game.game_active,
+        "queued": True,
+    }, status.HTTP_200_OK
+
+
+@contextmanager
+def _flush_lock():
+    # Held across processes, so only one writer on the host flushes at a time
+    with open(f"{settings.SCAN_QUEUE_PATH}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def pending_count():
+    """Return how many journal entries are waiting to be flushed."""
+    conn = _connection()
+    return conn.execute(
+        "SELECT COUNT(*) FROM scans WHERE seq > (SELECT seq FROM checkpoint)"
+    ).fetchone()[0]
+
+
+def flush(batch_size=None):
+    """Write the next batch of journal entries to the database; returns how many."""
+    batch_size = batch_size or settings.SCAN_QUEUE_BATCH_SIZE
+    with _flush_lock():
+        conn = _connection()
+        rows = conn.execute(
+            "SELECT seq, game_id, scanner_id, target_id, task_id FROM scans "
+            "WHERE seq > (SELECT seq FROM checkpoint) ORDER BY seq LIMIT ?",
+            (batch_size,),
+        ).fetchall()
+        if rows:
+            _apply(rows)
+            conn.execute("UPDATE checkpoint SET seq = ?", (rows[-1][0],))
+    return len(rows)
+
+
+def _drop_orphans(rows):
+    """Return the journal rows whose game, scanner, target and task still exist."""
+    player_ids = {uuid.UUID(player_id) for row in rows for player_id in row[2:4]}
+    players = set(Player.objects.filter(id__in=player_ids).values_list("id", flat=True))
+    tasks = set(Task.objects.filter(id__in={row[4] for row in rows}).values_list("id", flat=True))
+    games = set(GameState.objects.filter(id__in={row[1] for row in rows}).values_list("id", flat=True))
+    for player_id in player_ids - players:
+        forget(player_id)
+
+    kept = []
+    for row in rows:
+        seq, game_id, scanner_id, target_id, task_id = row
+        if (
+            game_id in games
+            and task_id in tasks
+            and uuid.UUID(scanner_id) in players
+            and uuid.UUID(target_id) in players
+        ):
+            kept.append(row)
+        else:
+            logger.warning(
+                "Dropping queued scan %s (scanner %s, target %s, task %s): deleted before it was flushed",
+                seq, scanner_id, target_id, task_id,
+            )
+    return kept
+
+
+def _apply(rows):
+    """Persist journal rows in one transaction, settling winners in journal order."""
+    from .views import _claim_winner_slot, _mark_cell
+
+    with transaction.atomic():
+        rows = _drop_orphans(rows)
+        entries = {}
+        for seq, game_id, scanner_id, target_id, task_id in rows:
+            entries.setdefault(uuid.UUID(scanner_id), []).append((seq, task_id))
+
+        ScanRecord.objects.bulk_create(
+            [
+                ScanRecord(
+                    game_id=game_id,
+                    scanner_id=uuid.UUID(scanner_id),
+                    target_id=uuid.UUID(target_id),
+                    task_id=task_id,
+                )
+                for _, game_id, scanner_id, target_id, task_id in rows
+            ],
+            ignore_conflicts=True,
+        )
+
+        scanners = Player.objects.filter(id__in=entries).only("id", "game", "completed_mask", "board_layout")
+        crossings = []
+        for scanner in scanners:
+            catalog = get_catalog(scanner.game_id)
+            layout = get_layout(scanner)
+            bits = [
+                (seq, cell_bit(layout, catalog.by_id[task_id].position))
+                for seq, task_id in entries[scanner.id]
+                if task_id in catalog.by_id
+            ]
+            combined = 0
+            for _, bit in bits:
+                combined |= bit
+            if not combined:
+                continue
+            previous_mask = _mark_cell(scanner, combined)
+            if count_lines(previous_mask) >= LINES_TO_WIN:
+                continue
+            # Find the scan that completed the fifth line
+            mask = previous_mask
+            for seq, bit in bits:
+                mask |= bit
+                if count_lines(mask) >= LINES_TO_WIN:
+                    crossings.append((seq, scanner))
+                    break
+
+        games = GameState.objects.in_bulk({scanner.game_id for _, scanner in crossings})
+        for _, scanner in sorted(crossings, key=lambda crossing: crossing[0]):
+            _claim_winner_slot(scanner, games[scanner.game_id])
+
+    for scanner_id in entries:
+        pin_to_primary(scanner_id)
+
+
+def _run_writer():
+    while True:
+        try:
+            while flush() == settings.SCAN_QUEUE_BATCH_SIZE:
+                pass
+        except Exception:
+            logger.exception("Flushing the scan queue failed; retrying")
+        finally:
+            close_old_connections()
+        time.sleep(settings.SCAN_QUEUE_FLUSH_INTERVAL)
+
+
+def ensure_writer():
+    """Start this process's writer thread unless ``SCAN_QUEUE_WRITER_THREAD`` is off."""
+    global _writer
+    if not settings.SCAN_QUEUE_WRITER_THREAD or (_writer is not None and _writer.is_alive()):
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_run_writer, name="scan-queue-writer", daemon=True)
+            _writer.start()
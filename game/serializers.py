@@ -3,6 +3,12 @@ from rest_framework import serializers
 from .models import GameState, Player, ScanRecord, Task, Winner
 
 
+def normalize_phone(value):
+    """Return the 10 digits of a phone number, or None if it doesn't have exactly 10."""
+    digits = "".join(c for c in value if c.isdigit())
+    return digits if len(digits) == 10 else None
+
+
 class PlayerSerializer(serializers.ModelSerializer):
     qr_code_url = serializers.SerializerMethodField()
 
@@ -29,8 +35,8 @@ class PlayerRegistrationSerializer(serializers.ModelSerializer):
         }
 
     def validate_phone(self, value):
-        digits = "".join(c for c in value if c.isdigit())
-        if len(digits) != 10:
+        digits = normalize_phone(value)
+        if digits is None:
             raise serializers.ValidationError("Phone number must be exactly 10 digits.")
         return digits
 
@@ -68,15 +74,20 @@ class ScanSubmitSerializer(serializers.Serializer):
     task_id = serializers.IntegerField()
 
 
-class GameStateSerializer(serializers.ModelSerializer):
-    winner_count = serializers.SerializerMethodField()
+class ScanBatchItemSerializer(serializers.Serializer):
+    target_id = serializers.UUIDField()
+    task_id = serializers.IntegerField()
+
+
+class ScanBatchSubmitSerializer(serializers.Serializer):
+    scanner_id = serializers.UUIDField()
+    scans = ScanBatchItemSerializer(many=True, allow_empty=False, max_length=25)
 
+
+class GameStateSerializer(serializers.ModelSerializer):
     class Meta:
         model = GameState
-        fields = ["game_active", "max_winners", "winner_count"]
-
-    def get_winner_count(self, obj):
-        return Winner.objects.count()
+        fields = ["slug", "name", "game_active", "max_winners", "winner_count"]
 
 
 class WinnerSerializer(serializers.ModelSerializer):
@@ -92,3 +103,9 @@ class BoardCellSerializer(serializers.Serializer):
     description = serializers.CharField()
     position = serializers.IntegerField()
     completed = serializers.BooleanField()
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Player
+        fields = ["id", "name", "lines_completed", "cells_completed", "last_progress_at"]
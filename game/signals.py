@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version
+from .models import GameState, Task
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, **kwargs):
+    # Now so this connection reads its own write, and again on commit: a
+    # worker that reloaded the tasks in between cached the old rows under
+    # the first version
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_delete, sender=GameState)
+def game_deleted(sender, instance, **kwargs):
+    # Now for this connection, and again on commit in case another worker
+    # re-cached the row before the delete committed
+    slug = instance.slug
+    GameState.invalidate_cache(slug)
+    transaction.on_commit(lambda: GameState.invalidate_cache(slug))
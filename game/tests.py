@@ -1,3 +1,1301 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import csv
+import gzip
+import importlib
+import io
+import json
+import os
+import tempfile
+import threading
+from unittest import mock, skipUnless
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, connections
+from django.db.models import Max
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import async_views, events, idempotency, qr, scan_queue, views
+from .cache_backends import FileBasedCache
+from .board import LINE_MASKS, LINES_TO_WIN, build_mask, count_lines, generate_layout, get_layout
+from .catalog import bump_catalog_version, get_catalog, get_catalog_version
+from .management.commands import loadtest
+from .metrics import registry
+from .models import DEFAULT_GAME_SLUG, GameState, IdempotencyRecord, Player, ScanRecord, Task, Winner, _game_state_memo
+from .renderers import dumps
+from .routers import REPLICA_DB_ALIAS, ReplicaRouter
+
+
+# Private in-memory caches, so one run never sees another's entries or leaves its own behind
+TEST_CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": f"test-{alias}",
+        "TIMEOUT": config.get("TIMEOUT", 300),
+        "OPTIONS": config.get("OPTIONS", {}),
+    }
+    for alias, config in settings.CACHES.items()
+}
+
+
+def reset_caches():
+    """Forget everything cached by earlier tests, shared or held by this process."""
+    for cache_ in caches.all():
+        cache_.clear()
+    _game_state_memo.clear()
+    qr._memory.clear()
+    bump_catalog_version()
+    scan_queue.clear_cache()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class GameTestCase(TestCase):
+    """The default game with 25 tasks and ``player_count`` players, and no cached state."""
+
+    player_count = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        # Before any rows are created
+        reset_caches()
+        cls.game = GameState.get_instance()
+        cls.tasks = [Task.objects.create(game=cls.game, description=f"Task {i}", position=i) for i in range(25)]
+        cls.players = [
+            Player.objects.create(game=cls.game, name=f"P{i}", phone=f"90000000{i:02d}")
+            for i in range(cls.player_count)
+        ]
+
+    def setUp(self):
+        reset_caches()
+
+    def scan(self, scanner, target, task, **extra):
+        return self.client.post(
+            reverse("submit-scan"),
+            {"scanner_id": str(scanner.id), "target_id": str(target.id), "task_id": task.id},
+            content_type="application/json",
+            **extra,
+        )
+
+
+class SubmitScanTests(GameTestCase):
+    def set_game_state(self, **fields):
+        game = GameState.get_instance()
+        for name, value in fields.items():
+            setattr(game, name, value)
+        game.save()
+
+    def task_for_cell(self, player, display):
+        return self.tasks[get_layout(player).index(display)]
+
+    def prime_for_win(self, player):
+        """Complete the top four rows; return the task whose cell completes a fifth line."""
+        mask = 0
+        for row in LINE_MASKS[:4]:
+            mask |= row
+        player.completed_mask = mask
+        player.save(update_fields=["completed_mask"])
+        return self.task_for_cell(player, 20)
+
+    def test_query_count(self):
+        scanner, target = self.players[:2]
+        game = GameState.get_cached()
+        get_catalog(game.pk)
+        # both players, duplicate-target check, insert, progress update, plus
+        # the savepoint pair TestCase wraps around the transaction
+        with self.assertNumQueries(6):
+            response = self.scan(scanner, target, self.tasks[0])
+        self.assertEqual(response.status_code, 201)
+
+    def test_marks_cell_in_display_coordinates(self):
+        scanner, target = self.players[:2]
+        task = self.task_for_cell(scanner, 7)
+        self.scan(scanner, target, task)
+        scanner.refresh_from_db()
+        self.assertEqual(scanner.completed_mask, 1 << 7)
+
+    def test_repeated_task_is_conflict(self):
+        scanner, first, second = self.players[:3]
+        self.scan(scanner, first, self.tasks[0])
+        response = self.scan(scanner, second, self.tasks[0])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["error"], "You already completed this task")
+        self.assertEqual(ScanRecord.objects.filter(scanner=scanner).count(), 1)
+
+    def test_game_ends_at_max_winners(self):
+        self.set_game_state(max_winners=1)
+        first, second, target = self.players[:3]
+
+        response = self.scan(first, target, self.prime_for_win(first))
+        self.assertTrue(response.json()["new_win"])
+        self.assertFalse(response.json()["game_active"])
+
+        self.set_game_state(game_active=True)
+        response = self.scan(second, target, self.prime_for_win(second))
+        self.assertFalse(response.json()["new_win"])
+        self.assertEqual(Winner.objects.count(), 1)
+        self.assertEqual(GameState.get_instance().winner_count, 1)
+
+    def test_ended_game_rejects_scans_without_queries(self):
+        self.set_game_state(game_active=False)
+        GameState.get_cached()
+        scanner, target = self.players[:2]
+        with self.assertNumQueries(0):
+            response = self.scan(scanner, target, self.tasks[0])
+        self.assertEqual(response.status_code, 403)
+
+    def test_batch_reports_each_item(self):
+        scanner, first, second = self.players[:3]
+        self.scan(scanner, first, self.tasks[0])
+        items = [
+            (second, self.tasks[1]),
+            (first, self.tasks[2]),
+            (scanner, self.tasks[3]),
+            (second, self.tasks[0]),
+        ]
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                reverse("submit-scan-batch"),
+                {
+                    "scanner_id": str(scanner.id),
+                    "scans": [{"target_id": str(p.id), "task_id": t.id} for p, t in items],
+                },
+                content_type="application/json",
+            )
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], [201, 409, 400, 409])
+        self.assertEqual(results[0]["scan"]["task"], self.tasks[1].id)
+        scanner.refresh_from_db()
+        self.assertEqual(scanner.completed_mask.bit_count(), 2)
+
+
+class IdempotencyTests(GameTestCase):
+    player_count = 3
+
+    def test_retry_replays_first_response(self):
+        scanner, target = self.players[:2]
+        first = self.scan(scanner, target, self.tasks[0], HTTP_IDEMPOTENCY_KEY="retry-1")
+        self.assertEqual(first.status_code, 201)
+        retry = self.scan(scanner, target, self.tasks[0], HTTP_IDEMPOTENCY_KEY="retry-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(ScanRecord.objects.count(), 1)
+
+    def test_replayed_after_many_other_keys(self):
+        scanner, target, other = self.players
+        first = self.scan(scanner, target, self.tasks[0], HTTP_IDEMPOTENCY_KEY="kept")
+        for i in range(400):
+            fingerprint = idempotency.fingerprint({"n": i})
+            self.assertIsNone(idempotency.claim(other.id, f"other-{i}", fingerprint))
+            idempotency.store(other.id, f"other-{i}", fingerprint, {"n": i}, 201)
+        retry = self.scan(scanner, target, self.tasks[0], HTTP_IDEMPOTENCY_KEY="kept")
+        self.assertEqual((retry.status_code, retry.json()), (201, first.json()))
+
+    def test_concurrent_claim_is_in_progress(self):
+        scanner = self.players[0]
+        fingerprint = idempotency.fingerprint({"task": 1})
+        self.assertIsNone(idempotency.claim(scanner.id, "twice", fingerprint))
+        self.assertEqual(idempotency.claim(scanner.id, "twice", fingerprint), idempotency.IN_PROGRESS)
+
+    def test_expired_record_is_claimed_again(self):
+        scanner, target = self.players[:2]
+        self.scan(scanner, target, self.tasks[0], HTTP_IDEMPOTENCY_KEY="expired")
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.scan(scanner, target, self.tasks[0], HTTP_IDEMPOTENCY_KEY="expired")
+        # Processed afresh rather than replayed
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["error"], "You already scanned this person")
+
+    def test_key_reused_for_another_scan(self):
+        scanner, target, other = self.players
+        key = {"HTTP_IDEMPOTENCY_KEY": "reused"}
+        self.scan(scanner, target, self.tasks[0], **key)
+        self.assertEqual(self.scan(scanner, other, self.tasks[1], **key).status_code, 422)
+        # Keys are scoped to the scanner
+        self.assertEqual(self.scan(other, target, self.tasks[1], **key).status_code, 201)
+
+    def test_sync_view_replays(self):
+        scanner, target = self.players[:2]
+        factory = RequestFactory()
+
+        def post():
+            request = factory.post(
+                "/api/scan/",
+                {"scanner_id": str(scanner.id), "target_id": str(target.id), "task_id": self.tasks[2].id},
+                content_type="application/json",
+                HTTP_IDEMPOTENCY_KEY="sync",
+            )
+            return views.submit_scan(request)
+
+        first = post()
+        retry = post()
+        self.assertEqual(retry.status_code, first.status_code)
+        self.assertEqual(json.loads(dumps(retry.data)), json.loads(dumps(first.data)))
+
+
+@override_settings(SCAN_INGESTION="queued", SCAN_QUEUE_WRITER_THREAD=False)
+class QueuedScanTests(GameTestCase):
+    player_count = 3
+
+    def setUp(self):
+        super().setUp()
+        journal_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(SCAN_QUEUE_PATH=os.path.join(journal_dir, "journal.sqlite3")))
+
+    def test_acknowledged_before_written(self):
+        scanner, target, other = self.players
+        response = self.scan(scanner, target, self.tasks[0])
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.json()["queued"])
+        self.assertFalse(ScanRecord.objects.exists())
+        # Duplicates are caught against the journal before it is flushed
+        self.assertEqual(self.scan(scanner, other, self.tasks[0]).status_code, 409)
+        self.assertEqual(self.scan(scanner, target, self.tasks[1]).status_code, 409)
+
+        self.assertEqual(scan_queue.flush(), 1)
+        self.assertEqual(scan_queue.pending_count(), 0)
+        scan = ScanRecord.objects.get()
+        self.assertEqual((scan.scanner, scan.target, scan.task), (scanner, target, self.tasks[0]))
+        scanner.refresh_from_db()
+        self.assertEqual(scanner.cells_completed, 1)
+
+    def test_batch_goes_through_journal(self):
+        scanner, target, other = self.players
+        self.assertEqual(self.scan(scanner, target, self.tasks[0]).status_code, 202)
+        response = self.client.post(
+            reverse("submit-scan-batch"),
+            {
+                "scanner_id": str(scanner.id),
+                "scans": [
+                    {"target_id": str(other.id), "task_id": self.tasks[1].id},
+                    {"target_id": str(scanner.id), "task_id": self.tasks[2].id},
+                    {"target_id": str(other.id), "task_id": self.tasks[0].id},
+                ],
+            },
+            content_type="application/json",
+        )
+        self.assertEqual([r["status"] for r in response.json()["results"]], [202, 400, 409])
+        self.assertEqual(response.json()["completed_lines"], 0)
+        self.assertFalse(ScanRecord.objects.exists())
+        # The batch's scan is seen by the next single scan before it is flushed
+        newcomer = Player.objects.create(game=self.game, name="Q3", phone="2000000003")
+        self.assertEqual(self.scan(scanner, newcomer, self.tasks[1]).status_code, 409)
+        self.assertEqual(scan_queue.flush(), 2)
+
+    def test_sync_write_drops_cached_history(self):
+        scanner, target, other = self.players
+        self.scan(scanner, target, self.tasks[0])
+        scan_queue.flush()
+        with override_settings(SCAN_INGESTION="sync"):
+            self.assertEqual(self.scan(scanner, other, self.tasks[1]).status_code, 201)
+        newcomer = Player.objects.create(game=self.game, name="Q3", phone="2000000003")
+        self.assertEqual(self.scan(scanner, newcomer, self.tasks[1]).status_code, 409)
+
+    def test_replay_after_crash_is_idempotent(self):
+        scanner, target, other = self.players
+        self.scan(scanner, target, self.tasks[0])
+        self.scan(scanner, other, self.tasks[1])
+        self.assertEqual(scan_queue.flush(), 2)
+        scanner.refresh_from_db()
+        mask = scanner.completed_mask
+
+        # As if the writer died after committing but before moving the checkpoint
+        with scan_queue._connection() as conn:
+            conn.execute("UPDATE checkpoint SET seq = 0")
+        self.assertEqual(scan_queue.flush(), 2)
+        self.assertEqual(ScanRecord.objects.count(), 2)
+        scanner.refresh_from_db()
+        self.assertEqual(scanner.completed_mask, mask)
+
+    def test_scans_of_deleted_players_are_dropped(self):
+        scanner, target, other = self.players
+        self.scan(scanner, target, self.tasks[0])
+        self.scan(other, scanner, self.tasks[0])
+        deleted_id = target.id
+        target.delete()
+
+        with self.assertLogs("game.scan_queue", "WARNING"):
+            self.assertEqual(scan_queue.flush(), 2)
+        self.assertEqual(scan_queue.pending_count(), 0)
+        # Nothing was written that points at the deleted player
+        connection.check_constraints()
+        scan = ScanRecord.objects.get()
+        self.assertEqual((scan.scanner, scan.target), (other, scanner))
+        # Nor are its scans still accepted from this process's cache
+        target.id = deleted_id
+        self.assertEqual(self.scan(target, scanner, self.tasks[1]).status_code, 404)
+
+    def test_winners_settled_in_journal_order(self):
+        game = GameState.get_instance()
+        game.max_winners = 1
+        game.save()
+        first, second, target = self.players[1], self.players[0], self.players[2]
+        for player in (first, second):
+            mask = 0
+            for row in LINE_MASKS[:4]:
+                mask |= row
+            player.completed_mask = mask
+            player.save(update_fields=["completed_mask"])
+
+        for player in (first, second):
+            task = self.tasks[get_layout(player).index(20)]
+            self.assertTrue(self.scan(player, target, task).json()["win_pending"])
+        scan_queue.flush()
+
+        self.assertEqual(list(Winner.objects.values_list("player", flat=True)), [first.id])
+        self.assertFalse(GameState.objects.get(pk=game.pk).game_active)
+
+
+class LeaderboardTests(GameTestCase):
+    def test_scores_follow_scans(self):
+        first, second, third, _ = self.players
+        self.scan(first, second, self.tasks[0])
+        self.scan(first, third, self.tasks[1])
+        self.scan(second, third, self.tasks[0])
+
+        first.refresh_from_db()
+        self.assertEqual(first.cells_completed, 2)
+        self.assertIsNotNone(first.last_progress_at)
+
+        data = self.client.get(reverse("leaderboard")).json()
+        self.assertEqual([p["name"] for p in data["players"]], ["P0", "P1"])
+        self.assertEqual([p["rank"] for p in data["players"]], [1, 2])
+        self.assertEqual(data["players"][0]["cells_completed"], 2)
+
+    def test_lines_rank_above_cells(self):
+        liner, filler = self.players[:2]
+        Player.objects.filter(pk=liner.pk).update(cells_completed=5, lines_completed=1)
+        Player.objects.filter(pk=filler.pk).update(cells_completed=9, lines_completed=0)
+        data = self.client.get(reverse("leaderboard"), {"limit": 1}).json()
+        self.assertEqual([p["name"] for p in data["players"]], ["P0"])
+
+    @override_settings(LEADERBOARD_CACHE_TTL=60)
+    def test_served_from_cache(self):
+        self.client.get(reverse("leaderboard"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("leaderboard"))
+        with self.assertNumQueries(0):
+            cached = self.client.get(reverse("leaderboard"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+    @override_settings(LEADERBOARD_CACHE_TTL=0)
+    def test_stale_copy_served_while_rebuilding(self):
+        self.client.get(reverse("leaderboard"))
+        # Another worker holds the rebuild lock
+        lock_key = f"leaderboard:{GameState.get_cached().pk}:20:lock"
+        caches["leaderboard"].add(lock_key, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("leaderboard")).status_code, 200)
+        caches["leaderboard"].delete(lock_key)
+        with self.assertNumQueries(1):
+            self.client.get(reverse("leaderboard"))
+
+
+class RecomputeGameTests(GameTestCase):
+    player_count = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.start = timezone.now() - timedelta(hours=1)
+
+    def complete(self, player, tasks, offset, status="pending"):
+        target = self.players[-1]
+        for i, task in enumerate(tasks):
+            scan = ScanRecord.objects.create(
+                game=self.game, scanner=player, target=target, task=task, verification_status=status
+            )
+            ScanRecord.objects.filter(pk=scan.pk).update(timestamp=self.start + timedelta(minutes=offset + i))
+
+    def expected_win(self, player):
+        """Replay a player's scans one at a time, as submit_scan would."""
+        layout, mask = get_layout(player), 0
+        for position, timestamp in (
+            ScanRecord.objects.filter(scanner=player).order_by("timestamp").values_list("task__position", "timestamp")
+        ):
+            mask |= 1 << layout[position]
+            if count_lines(mask) >= LINES_TO_WIN:
+                return timestamp
+
+    def test_rebuilds_progress_and_winners(self):
+        first, second, _ = self.players
+        self.complete(first, self.tasks, offset=0)
+        self.complete(second, self.tasks[:12], offset=5)
+        Winner.objects.create(game=self.game, player=second, win_type="bingo")
+
+        call_command("recompute_game", stdout=io.StringIO())
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.completed_mask, first.cells_completed, first.lines_completed), (2**25 - 1, 25, 12))
+        self.assertEqual(first.last_progress_at, self.start + timedelta(minutes=24))
+        mask = build_mask(get_layout(second), range(12))
+        self.assertEqual(second.completed_mask, mask)
+        self.assertEqual((second.cells_completed, second.lines_completed), (12, count_lines(mask)))
+
+        winner = Winner.objects.get()
+        self.assertEqual((winner.player, winner.won_at), (first, self.expected_win(first)))
+        self.assertEqual(GameState.get_instance().winner_count, 1)
+
+    def test_approved_only_and_reopens_game(self):
+        first, second, _ = self.players
+        GameState.objects.filter(pk=self.game.pk).update(max_winners=1, winner_count=1, game_active=False)
+        self.complete(first, self.tasks, offset=0)
+        self.complete(second, self.tasks[:3], offset=0, status="approved")
+        Winner.objects.create(game=self.game, player=first, win_type="bingo")
+
+        call_command("recompute_game", "--approved-only", stdout=io.StringIO())
+
+        first.refresh_from_db()
+        self.assertEqual((first.completed_mask, first.cells_completed, first.last_progress_at), (0, 0, None))
+        self.assertFalse(Winner.objects.exists())
+        game = GameState.get_instance()
+        self.assertEqual(game.winner_count, 0)
+        self.assertTrue(game.game_active)
+
+        call_command("recompute_game", stdout=io.StringIO())
+        game = GameState.get_instance()
+        self.assertEqual(list(Winner.objects.values_list("player", flat=True)), [first.pk])
+        self.assertFalse(game.game_active)
+
+
+class ReconcileWinnersTests(GameTestCase):
+    player_count = 2
+
+    def test_corrects_count_and_game_active(self):
+        for player in self.players:
+            Winner.objects.create(game=self.game, player=player, win_type="bingo")
+        GameState.objects.filter(pk=self.game.pk).update(max_winners=2, winner_count=0, game_active=True)
+
+        out = io.StringIO()
+        call_command("reconcile_winners", "--dry-run", stdout=out)
+        self.assertIn(
+            "main: would correct winner count from 0 to 2 and game_active from True to False.", out.getvalue()
+        )
+        game = GameState.objects.get(pk=self.game.pk)
+        self.assertEqual((game.winner_count, game.game_active), (0, True))
+
+        call_command("reconcile_winners", stdout=io.StringIO())
+        game = GameState.objects.get(pk=self.game.pk)
+        self.assertEqual((game.winner_count, game.game_active), (2, False))
+
+    def test_reopens_game_ended_by_a_wrong_count(self):
+        Winner.objects.create(game=self.game, player=self.players[0], win_type="bingo")
+        GameState.objects.filter(pk=self.game.pk).update(max_winners=2, winner_count=2, game_active=False)
+        call_command("reconcile_winners", stdout=io.StringIO())
+        game = GameState.objects.get(pk=self.game.pk)
+        self.assertEqual((game.winner_count, game.game_active), (1, True))
+
+
+class CatalogTests(GameTestCase):
+    player_count = 0
+
+    def test_task_edit_bumps_version_again_on_commit(self):
+        task = self.tasks[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            task.description = "New"
+            task.save()
+            # What another worker could load and cache before the commit
+            during = get_catalog_version()
+        self.assertNotEqual(get_catalog_version(), during)
+
+
+class EventsTests(GameTestCase):
+    player_count = 1
+
+    def refresh(self, notifier):
+        """Run one poll and return the events it broadcast as (event, data) pairs."""
+        queue = asyncio.Queue()
+        notifier._subscribers = {queue}
+        async_to_sync(notifier._refresh)()
+        sent = []
+        while not queue.empty():
+            event, data = queue.get_nowait().decode().split("\n")[:2]
+            sent.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+        return sent
+
+    def test_broadcasts_state_changes_and_new_winners(self):
+        notifier = events.ChangeNotifier(DEFAULT_GAME_SLUG, interval=0)
+        [(event, state)] = self.refresh(notifier)
+        self.assertEqual((event, state["game_active"], state["winner_count"]), ("state", True, 0))
+        self.assertEqual(self.refresh(notifier), [])
+
+        Winner.objects.create(game=self.game, player=self.players[0], win_type="bingo")
+        GameState.objects.filter(pk=self.game.pk).update(winner_count=1)
+        sent = self.refresh(notifier)
+        self.assertEqual([event for event, _ in sent], ["winner", "state"])
+        self.assertEqual(sent[0][1]["player_name"], "P0")
+        self.assertEqual(sent[1][1]["winner_count"], 1)
+
+    def test_unknown_game_is_404_and_not_kept(self):
+        sent = []
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "path": "/api/games/nope/events/", "headers": []}
+        async_to_sync(events.event_stream)(scope, receive, send, slug="nope")
+        self.assertEqual(sent[0]["status"], 404)
+        self.assertNotIn("nope", events._notifiers)
+
+    def test_refresh_errors_are_logged_and_connections_recycled(self):
+        notifier = events.ChangeNotifier(DEFAULT_GAME_SLUG, interval=0)
+        notifier._subscribers.add(object())
+        calls = []
+
+        async def refresh():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise DatabaseError("connection already closed")
+            notifier._subscribers.clear()
+
+        notifier._refresh = refresh
+        with mock.patch.object(events, "close_old_connections") as close, self.assertLogs("game.events", "ERROR"):
+            async_to_sync(notifier._run)()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(close.call_count, 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MultiGameTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.main = GameState.get_instance()
+        cls.other = GameState.objects.create(slug="spring", name="Spring Fest")
+        cls.tasks = {}
+        cls.players = {}
+        for game in (cls.main, cls.other):
+            # Positions and phones only have to be unique within a game
+            cls.tasks[game.slug] = [
+                Task.objects.create(game=game, description=f"{game.slug} {i}", position=i) for i in range(25)
+            ]
+            cls.players[game.slug] = [
+                Player.objects.create(game=game, name=f"{game.slug} {i}", phone=f"70000000{i:02d}") for i in range(2)
+            ]
+
+    def setUp(self):
+        reset_caches()
+
+    def url(self, name, game_slug, **kwargs):
+        return reverse(name, kwargs={"game_slug": game_slug, **kwargs})
+
+    def scan(self, game_slug, scanner, target, task):
+        return self.client.post(
+            self.url("submit-scan", game_slug),
+            {"scanner_id": str(scanner.id), "target_id": str(target.id), "task_id": task.id},
+            content_type="application/json",
+        )
+
+    def test_unprefixed_routes_serve_default_game(self):
+        self.assertEqual(self.client.get(reverse("game-state")).json()["slug"], "main")
+        self.assertEqual(self.client.get(self.url("game-state", "spring")).json()["name"], "Spring Fest")
+        self.assertEqual(self.client.get(self.url("game-state", "nope")).status_code, 404)
+
+    def test_deleted_game_is_gone_from_cache(self):
+        doomed = GameState.objects.create(slug="doomed")
+        self.assertEqual(self.client.get(self.url("game-state", "doomed")).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            doomed.delete()
+        self.assertEqual(self.client.get(self.url("game-state", "doomed")).status_code, 404)
+        response = self.client.post(self.url("register", "doomed"), {"name": "Late", "phone": "4200000000"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_scans_stay_in_their_game(self):
+        scanner, target = self.players["spring"]
+        response = self.scan("spring", scanner, target, self.tasks["spring"][0])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ScanRecord.objects.get().game, self.other)
+        # Players and tasks from another game are not found
+        self.assertEqual(self.scan("main", scanner, target, self.tasks["main"][0]).status_code, 404)
+        scanner, target = self.players["main"]
+        self.assertEqual(self.scan("main", scanner, target, self.tasks["spring"][1]).status_code, 404)
+
+    def test_leaderboard_and_board_per_game(self):
+        scanner, target = self.players["spring"]
+        self.scan("spring", scanner, target, self.tasks["spring"][0])
+        spring = self.client.get(self.url("leaderboard", "spring")).json()["players"]
+        self.assertEqual([entry["name"] for entry in spring], [scanner.name])
+        self.assertEqual(self.client.get(reverse("leaderboard")).json()["players"], [])
+
+        board = self.client.get(self.url("get-board", "spring", player_id=scanner.id)).json()
+        self.assertEqual({cell["description"].split()[0] for cell in board}, {"spring"})
+        self.assertEqual(
+            self.client.get(reverse("get-board", args=[scanner.id])).status_code, 404
+        )
+
+    def test_register_same_phone_in_two_games(self):
+        data = {"name": "Dup", "phone": "7000000000"}
+        self.assertEqual(self.client.post(reverse("register"), data).status_code, 200)
+        response = self.client.post(self.url("register", "spring"), {"name": "New", "phone": "7100000000"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Player.objects.get(name="New").game, self.other)
+
+
+class AsyncViewTests(GameTestCase):
+    player_count = 2
+
+    def test_board_matches_sync_view(self):
+        player = self.players[0]
+        Player.objects.filter(pk=player.pk).update(completed_mask=0b1011)
+        url = reverse("get-board", args=[player.id])
+
+        sync_response = views.get_board(RequestFactory().get(url), player_id=player.id)
+        async_response = async_to_sync(async_views.get_board)(RequestFactory().get(url), player_id=player.id)
+        self.assertEqual(json.loads(async_response.content), sync_response.data)
+        self.assertEqual(async_response["ETag"], sync_response["ETag"])
+
+    def test_compact_board(self):
+        player = self.players[0]
+        Player.objects.filter(pk=player.pk).update(completed_mask=0b1011)
+        url = reverse("get-board", args=[player.id])
+        full = self.client.get(url)
+        compact = self.client.get(url, {"format": "compact"})
+        self.assertNotEqual(compact["ETag"], full["ETag"])
+        self.assertLess(len(compact.content) * 5, len(full.content))
+
+        board = compact.json()
+        cells = {cell["position"]: (cell["task_id"], cell["completed"]) for cell in full.json()}
+        self.assertEqual(
+            {cell: (task_id, bool(board["mask"] >> cell & 1)) for cell, task_id in enumerate(board["tasks"])},
+            cells,
+        )
+        sync_response = views.get_board(RequestFactory().get(url, {"format": "compact"}), player_id=player.id)
+        self.assertEqual(sync_response.data, board)
+
+    def test_submit_scan(self):
+        scanner, target = self.players
+        request = RequestFactory().post(
+            reverse("submit-scan"),
+            {"scanner_id": str(scanner.id), "target_id": str(target.id), "task_id": self.tasks[3].id},
+            content_type="application/json",
+        )
+        response = async_to_sync(async_views.submit_scan)(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.content)["completed_lines"], 0)
+        self.assertTrue(ScanRecord.objects.filter(scanner=scanner, task=self.tasks[3]).exists())
+
+    def test_metrics_count_async_queries(self):
+        registry.clear()
+        self.client.get(reverse("get-board", args=[self.players[0].id]))
+        self.assertRegex(registry.render(), r'bingo_db_queries_total\{view="get-board"\} [1-9]')
+
+
+class ExportTests(GameTestCase):
+    player_count = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth import get_user_model
+
+        super().setUpTestData()
+        cls.staff = get_user_model().objects.create_user("organizer", password="pw", is_staff=True)
+        for scanner, target, task in zip(cls.players, cls.players[1:], cls.tasks):
+            ScanRecord.objects.create(game=cls.game, scanner=scanner, target=target, task=task)
+        Winner.objects.create(game=cls.game, player=cls.players[0])
+
+    def export(self, name, **params):
+        response = self.client.get(reverse("export", args=[name]), params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get(reverse("export", args=["scans"])).status_code, 403)
+
+    def test_scans_csv(self):
+        self.client.force_login(self.staff)
+        response, content = self.export("scans")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(rows[0][:3], ["id", "scanner_id", "scanner_name"])
+        self.assertEqual([row[2] for row in rows[1:]], ["P0", "P1"])
+        self.assertEqual(rows[1][6], "Task 0")
+
+    def test_winners_ndjson_gzip(self):
+        self.client.force_login(self.staff)
+        response, content = self.export("winners", format="ndjson", gzip="1")
+        self.assertIn(".ndjson.gz", response["Content-Disposition"])
+        lines = gzip.decompress(content).decode().splitlines()
+        self.assertEqual([json.loads(line)["player_name"] for line in lines], ["P0"])
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("export_data", "players", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), len(self.players) + 1)
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+)
+class AdminChangelistQueryTests(GameTestCase):
+    """Changelist query counts must not grow with the number of rows listed."""
+
+    player_count = 0
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth import get_user_model
+
+        super().setUpTestData()
+        cls.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def add_players(self, count):
+        start = Player.objects.count()
+        players = [
+            Player.objects.create(game=self.game, name=f"A{start + i}", phone=f"81{start + i:08d}")
+            for i in range(count)
+        ]
+        for scanner in players:
+            for task, target in zip(self.tasks[:3], players):
+                ScanRecord.objects.create(game=self.game, scanner=scanner, target=target, task=task)
+            Winner.objects.create(game=self.game, player=scanner)
+
+    def assertChangelistBudget(self, model, budget):
+        # session, user, the page's rows and its count, plus per-page overhead
+        url = reverse(f"admin:game_{model}_changelist")
+        self.add_players(2)
+        with self.assertNumQueries(budget):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.add_players(8)
+        with self.assertNumQueries(budget):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_player_changelist(self):
+        self.assertChangelistBudget("player", 6)
+
+    def test_winner_changelist(self):
+        self.assertChangelistBudget("winner", 6)
+
+    def test_scanrecord_changelist(self):
+        self.assertChangelistBudget("scanrecord", 5)
+
+    def test_task_changelist(self):
+        self.assertChangelistBudget("task", 6)
+
+    def test_gamestate_changelist(self):
+        self.assertChangelistBudget("gamestate", 5)
+
+    def test_player_change_page(self):
+        self.add_players(3)
+        player = Player.objects.first()
+        url = reverse("admin:game_player_change", args=[player.pk])
+        # The scan inline is one joined query however many scans the player has
+        with self.assertNumQueries(6):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class GameStateSaveTests(GameTestCase):
+    player_count = 0
+
+    def test_concurrent_saves_get_distinct_versions(self):
+        first = GameState.get_instance()
+        second = GameState.objects.get(pk=first.pk)
+        first.save()
+        second.save()
+        self.assertNotEqual(first.version, second.version)
+        self.assertEqual(GameState.objects.get(pk=first.pk).version, second.version)
+
+    def test_admin_edit_keeps_concurrent_winner_count(self):
+        from django.contrib import admin as django_admin
+        from django.contrib.auth import get_user_model
+
+        request = RequestFactory().post("/")
+        request.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        model_admin = django_admin.site._registry[GameState]
+        stale = GameState.get_instance()
+        # A winner is admitted while the admin has the form open
+        GameState.objects.filter(pk=stale.pk).update(winner_count=3, game_active=False)
+
+        form = model_admin.get_form(request, stale)(
+            {"slug": stale.slug, "name": "", "game_active": "on", "max_winners": "20"}, instance=stale
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        model_admin.save_model(request, form.save(commit=False), form, change=True)
+
+        game = GameState.objects.get(pk=stale.pk)
+        self.assertEqual((game.max_winners, game.winner_count, game.game_active), (20, 3, False))
+        self.assertEqual(game.version, stale.version)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Runs against a second SQLite database standing in for a lagging replica."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Registered here rather than in settings so the test runner doesn't
+        # set the replica up as a mirror of the default database
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.settings[REPLICA_DB_ALIAS] = {
+            **connections.settings["default"],
+            "NAME": os.path.join(cls.replica_dir.name, "replica.sqlite3"),
+        }
+        call_command("migrate", database=REPLICA_DB_ALIAS, verbosity=0)
+        cls.databases = {"default", REPLICA_DB_ALIAS}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA_DB_ALIAS].close()
+        del connections[REPLICA_DB_ALIAS]
+        del connections.settings[REPLICA_DB_ALIAS]
+        cls.replica_dir.cleanup()
+
+    def setUp(self):
+        reset_caches()
+        game = GameState.get_instance()
+        self.tasks = [Task.objects.create(game=game, description=f"Task {i}", position=i) for i in range(25)]
+        self.players = [Player.objects.create(game=game, name=f"R{i}", phone=f"40000000{i:02d}") for i in range(2)]
+        # Replicate the starting rows
+        for model in (GameState, Task, Player):
+            model.objects.using(REPLICA_DB_ALIAS).bulk_create(model.objects.using("default").all())
+
+    def test_reads_outside_views_use_primary(self):
+        self.assertIsNone(ReplicaRouter().db_for_read(Player))
+        self.assertEqual(ReplicaRouter().db_for_write(Player), "default")
+
+    def test_read_only_views_use_replica(self):
+        player = self.players[0]
+        Player.objects.filter(pk=player.pk).update(name="Renamed")
+        response = self.client.get(reverse("get-player", args=[player.id]))
+        self.assertEqual(response.json()["name"], "R0")
+
+    def test_scan_writes_to_primary_and_pins_scanner(self):
+        scanner, target = self.players
+        response = self.client.post(
+            reverse("submit-scan"),
+            {"scanner_id": str(scanner.id), "target_id": str(target.id), "task_id": self.tasks[0].id},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ScanRecord.objects.using("default").count(), 1)
+        self.assertFalse(ScanRecord.objects.using(REPLICA_DB_ALIAS).exists())
+
+        # The scanner's own board reads the primary, so it shows the new cell
+        board = self.client.get(reverse("get-board", args=[scanner.id])).json()
+        self.assertEqual(sum(cell["completed"] for cell in board), 1)
+        # Other players keep reading the replica
+        Player.objects.filter(pk=target.pk).update(name="Renamed")
+        self.assertEqual(self.client.get(reverse("get-player", args=[target.id])).json()["name"], "R1")
+
+    def test_new_player_is_readable_right_after_registering(self):
+        response = self.client.post(reverse("register"), {"name": "Newcomer", "phone": "4100000000"})
+        self.assertEqual(response.status_code, 201)
+        response = self.client.get(reverse("player-bootstrap", args=[response.json()["id"]]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_game_state_always_filled_from_primary(self):
+        other = GameState.objects.create(slug="replica-lag", max_winners=3)
+        response = self.client.get(reverse("game-state", kwargs={"game_slug": other.slug}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["max_winners"], 3)
+
+
+class FileBasedCacheTests(SimpleTestCase):
+    def test_add_has_a_single_winner_across_threads(self):
+        with tempfile.TemporaryDirectory() as location:
+            results = []
+
+            def claim():
+                # A cache per thread, like one per worker process
+                results.append(FileBasedCache(location, {}).add("claim", threading.get_ident()))
+
+            threads = [threading.Thread(target=claim) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(results.count(True), 1)
+            self.assertIsNotNone(FileBasedCache(location, {}).get("claim"))
+
+    def test_cull_drops_expired_entries_first(self):
+        location = self.enterContext(tempfile.TemporaryDirectory())
+        pins = FileBasedCache(location, {"OPTIONS": {"MAX_ENTRIES": 4}})
+        for i in range(3):
+            pins.set(f"expired{i}", True, timeout=0)
+        pins.set("live", True)
+        # Full: the expired entries make room, not a random third of all of them
+        pins.set("new", True)
+        self.assertEqual(len(pins._list_cache_files()), 2)
+        self.assertTrue(pins.get("live"))
+        self.assertTrue(pins.get("new"))
+
+    def test_uncapped_cache_never_lists_entries(self):
+        location = self.enterContext(tempfile.TemporaryDirectory())
+        qr_cache = FileBasedCache(location, {"TIMEOUT": None, "OPTIONS": {"MAX_ENTRIES": None}})
+        with mock.patch.object(qr_cache, "_list_cache_files") as list_cache_files:
+            for i in range(5):
+                qr_cache.set(f"qr:{i}", b"png")
+        list_cache_files.assert_not_called()
+        self.assertEqual(qr_cache.get("qr:4"), b"png")
+
+
+class PlayerQRTests(GameTestCase):
+    player_count = 1
+
+    def url(self, fmt):
+        return reverse("player-qr", args=[self.players[0].id, fmt])
+
+    def test_png_and_svg(self):
+        png = self.client.get(self.url("png"))
+        self.assertEqual(png["Content-Type"], "image/png")
+        self.assertTrue(png.content.startswith(b"\x89PNG"))
+        svg = self.client.get(self.url("svg"))
+        self.assertEqual(svg["Content-Type"], "image/svg+xml")
+        self.assertIn(b"<svg", svg.content)
+        self.assertNotEqual(png["ETag"], svg["ETag"])
+        for response in (png, svg):
+            self.assertIn("immutable", response["Cache-Control"])
+            self.assertIn("max-age=31536000", response["Cache-Control"])
+
+    def test_not_modified(self):
+        response = self.client.get(self.url("png"))
+        cached = self.client.get(self.url("png"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+        self.assertEqual(cached["ETag"], response["ETag"])
+        self.assertIn("immutable", cached["Cache-Control"])
+
+    def test_rendered_once(self):
+        first = self.client.get(self.url("png"))
+        # Another worker: nothing in its memory, the render in the shared cache
+        qr._memory.clear()
+        render = mock.Mock()
+        with mock.patch.dict(qr._RENDERERS, png=render):
+            second = self.client.get(self.url("png"))
+        render.assert_not_called()
+        self.assertEqual(second.content, first.content)
+
+    def test_unknown_format_or_player(self):
+        self.assertEqual(self.client.get(self.url("gif")).status_code, 404)
+        other = reverse("player-qr", args=["00000000-0000-0000-0000-000000000000", "png"])
+        self.assertEqual(self.client.get(other).status_code, 404)
+
+    def test_memory_cache_is_bounded(self):
+        lru = qr._LRU(maxsize=2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertEqual((lru.get("a"), lru.get("b"), lru.get("c")), (1, None, 3))
+        self.assertEqual(len(lru._data), 2)
+
+
+class RebuildProgressTests(GameTestCase):
+    player_count = 3
+
+    def complete(self, player, tasks):
+        for task in tasks:
+            ScanRecord.objects.create(game=self.game, scanner=player, target=self.players[-1], task=task)
+
+    def test_rebuild_after_scan_deleted(self):
+        first, second, _ = self.players
+        # The tasks behind the top row of the first player's board
+        layout = get_layout(first)
+        row = [self.tasks[layout.index(cell)] for cell in range(5)]
+        self.complete(first, row)
+        self.complete(second, row[:1])
+        call_command("rebuild_progress", stdout=io.StringIO())
+        first.refresh_from_db()
+        self.assertEqual((first.completed_mask, first.cells_completed, first.lines_completed), (LINE_MASKS[0], 5, 1))
+
+        # What deleting a scan in the admin leaves behind
+        ScanRecord.objects.filter(scanner=first, task=row[0]).delete()
+        call_command("rebuild_progress", stdout=io.StringIO())
+
+        first.refresh_from_db()
+        self.assertEqual((first.completed_mask, first.cells_completed, first.lines_completed), (0b11110, 4, 0))
+        latest = ScanRecord.objects.filter(scanner=first).aggregate(Max("timestamp"))["timestamp__max"]
+        self.assertEqual(first.last_progress_at, latest)
+        second.refresh_from_db()
+        self.assertEqual(second.completed_mask, build_mask(get_layout(second), [row[0].position]))
+
+    def test_layout_stored_on_create(self):
+        player = Player.objects.get(pk=self.players[0].pk)
+        self.assertEqual(bytes(player.board_layout), generate_layout(player.id))
+
+    def test_rebuild_backfills_missing_layouts(self):
+        player = self.players[0]
+        Player.objects.filter(pk=player.pk).update(board_layout=b"")
+        call_command("rebuild_progress", stdout=io.StringIO())
+        player.refresh_from_db()
+        self.assertEqual(bytes(player.board_layout), generate_layout(player.id))
+
+    def test_migration_backfills_layouts(self):
+        Player.objects.update(board_layout=b"")
+        migration = importlib.import_module("game.migrations.0004_player_board_layout")
+        migration.backfill_board_layouts(apps, None)
+        for player in Player.objects.all():
+            self.assertEqual(bytes(player.board_layout), generate_layout(player.id))
+
+
+class BootstrapTests(GameTestCase):
+    player_count = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Scans by and of other players, which the bootstrap must not load one by one
+        for player in cls.players[1:]:
+            for task in cls.tasks[:5]:
+                ScanRecord.objects.create(game=cls.game, scanner=player, target=cls.players[0], task=task)
+
+    def test_payload_and_query_count(self):
+        player = self.players[0]
+        Player.objects.filter(pk=player.pk).update(completed_mask=LINE_MASKS[0] | 1 << 12)
+        # The player, the tasks and the game state, however many cells are done
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("player-bootstrap", args=[player.id]))
+        data = response.json()
+        self.assertEqual((data["player"]["id"], data["player"]["name"]), (str(player.id), "P0"))
+        self.assertNotIn("qr_code_url", data["player"])
+        self.assertEqual((data["completed_count"], data["completed_lines"], data["lines_to_win"]), (6, 1, 5))
+        self.assertEqual(len(data["board"]), 25)
+        self.assertEqual({cell["position"] for cell in data["board"] if cell["completed"]}, {0, 1, 2, 3, 4, 12})
+        self.assertEqual((data["game_state"]["game_active"], data["game_state"]["winner_count"]), (True, 0))
+
+    def test_qr_url_on_request(self):
+        player = self.players[0]
+        data = self.client.get(reverse("player-bootstrap", args=[player.id]), {"qr": "1"}).json()
+        self.assertTrue(data["player"]["qr_code_url"].endswith(reverse("player-qr", args=[player.id, "png"])))
+
+    def test_unknown_player(self):
+        url = reverse("player-bootstrap", args=["00000000-0000-0000-0000-000000000000"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ConditionalGetTests(GameTestCase):
+    player_count = 2
+
+    def revalidate(self, url, *builders):
+        """Fetch ``url``, then again with its ETag; the second response must not build a body."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with contextlib.ExitStack() as stack:
+            patched = [
+                stack.enter_context(mock.patch.object(module, name))
+                for module in (views, async_views)
+                for name in builders
+                if hasattr(module, name)
+            ]
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+        self.assertEqual(cached["ETag"], response["ETag"])
+        for builder in patched:
+            builder.assert_not_called()
+        return response["ETag"]
+
+    def test_board(self):
+        scanner, target = self.players
+        url = reverse("get-board", args=[scanner.id])
+        etag = self.revalidate(url, "build_board", "BoardCellSerializer")
+        self.scan(scanner, target, self.tasks[0])
+        self.assertNotEqual(self.revalidate(url, "build_board", "BoardCellSerializer"), etag)
+
+    def test_game_state(self):
+        url = reverse("game-state")
+        etag = self.revalidate(url, "GameStateSerializer")
+        GameState.get_instance().save()
+        self.assertNotEqual(self.revalidate(url, "GameStateSerializer"), etag)
+
+    def test_winners(self):
+        url = reverse("winners")
+        etag = self.revalidate(url, "WinnerSerializer")
+        Winner.objects.create(game=self.game, player=self.players[0], win_type="bingo")
+        self.assertNotEqual(self.revalidate(url, "WinnerSerializer"), etag)
+
+    def test_tasks(self):
+        url = reverse("tasks")
+        etag = self.revalidate(url, "TaskSerializer")
+        Task.objects.create(game=self.game, description="Task 25", position=25)
+        self.assertNotEqual(self.revalidate(url, "TaskSerializer"), etag)
+
+
+class FakeTransport:
+    """Answers the loadtest's requests like the API would, without a server."""
+
+    def __init__(self, base_url):
+        self.requests = []
+        self.done = set()
+
+    def request(self, method, path, body=None):
+        self.requests.append((method, path))
+        if path.endswith("/register/"):
+            return 201, {"id": body["phone"]}, None, 100
+        if path.endswith("/tasks/"):
+            return 200, [{"id": task_id} for task_id in range(1, 26)], None, 1000
+        if path.endswith("/scan/"):
+            key = (body["scanner_id"], body["task_id"])
+            if body["target_id"] == body["scanner_id"] or key in self.done:
+                return 400, {"error": "rejected"}, None, 30
+            self.done.add(key)
+            return 201, {}, None, 200
+        return 200, {}, None, 500
+
+
+class LoadtestTests(SimpleTestCase):
+    def run_loadtest(self, *args):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        output = os.path.join(directory, "report.json")
+        with mock.patch.object(loadtest, "HTTPTransport", FakeTransport):
+            call_command("loadtest", "--url", "http://testserver", "--output", output, *args)
+        with open(output) as f:
+            return json.load(f)
+
+    def test_report(self):
+        report = self.run_loadtest("--players", "5", "--concurrency", "2", "--duration", "0.2", "--seed", "1")
+        self.assertEqual((report["mode"], report["players"], report["concurrency"]), ("http", 5, 2))
+        endpoints = report["endpoints"]
+        # Registration is setup, not part of the measured mix
+        self.assertLessEqual(set(endpoints), {"board", "game-state", "scan", "winners"})
+        self.assertEqual(report["requests"], sum(endpoint["requests"] for endpoint in endpoints.values()))
+        self.assertIn("201", endpoints["scan"]["statuses"])
+        for endpoint in endpoints.values():
+            self.assertLessEqual(endpoint["p50_ms"], endpoint["p95_ms"])
+            self.assertLessEqual(endpoint["p95_ms"], endpoint["p99_ms"])
+            self.assertIsNone(endpoint["mean_queries"])
+
+    def test_needs_two_players(self):
+        with self.assertRaisesMessage(CommandError, "--players must be at least 2"):
+            self.run_loadtest("--players", "1")
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([loadtest._percentile(values, pct) for pct in (50, 95, 99)], [50, 95, 99])
+        self.assertIsNone(loadtest._percentile([], 50))
+
+
+class MetricsTests(GameTestCase):
+    player_count = 0
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.staff = get_user_model().objects.create_user("organizer", password="pw", is_staff=True)
+
+    def setUp(self):
+        super().setUp()
+        registry.clear()
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_staff_or_token_only(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+
+        get_user_model().objects.create_user("player", password="pw")
+        self.client.login(username="player", password="pw")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_no_token_configured(self):
+        with override_settings(METRICS_TOKEN=""):
+            response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer ")
+        self.assertEqual(response.status_code, 403)
+
+    def test_prometheus_text(self):
+        self.client.get(reverse("game-state"))
+        self.client.get(reverse("get-board", args=["00000000-0000-0000-0000-000000000000"]))
+        self.client.force_login(self.staff)
+        body = self.client.get(reverse("metrics")).content.decode()
+        lines = body.splitlines()
+        self.assertIn("# TYPE bingo_request_duration_seconds histogram", lines)
+        self.assertIn('bingo_request_duration_seconds_bucket{view="game-state",le="+Inf"} 1', lines)
+        self.assertIn('bingo_request_duration_seconds_count{view="game-state"} 1', lines)
+        self.assertIn("# TYPE bingo_db_queries_total counter", lines)
+        self.assertIn('bingo_requests_total{view="game-state",status="200"} 1', lines)
+        self.assertIn('bingo_requests_total{view="get-board",status="404"} 1', lines)
+        self.assertRegex(body, r'bingo_response_bytes_total\{view="game-state"\} [1-9]')
+        # The endpoint doesn't count its own scrapes
+        self.assertNotIn('view="metrics"', body)
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=0)
+    def test_slow_requests_logged(self):
+        with self.assertLogs("game.metrics", "WARNING") as logs:
+            self.client.get(reverse("get-board", args=["00000000-0000-0000-0000-000000000000"]))
+        self.assertEqual(len(logs.records), 1)
+        message = logs.records[0].getMessage()
+        self.assertRegex(
+            message, r"^Slow request GET /api/board/[-0-9a-f]+/ \(view get-board\): [0-9.]+ ms, [1-9]\d* queries"
+        )
+        self.assertIn("ms] SELECT", message)
+
+
+class ImportPlayersTests(GameTestCase):
+    player_count = 1
+
+    def import_csv(self, text, *args):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        path = os.path.join(directory, "players.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        out = io.StringIO()
+        call_command("import_players", path, *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_normalizes_and_dedupes(self):
+        out = self.import_csv(
+            "name,phone\n"
+            "Ann,(555) 123-4567\n"
+            "Ann again,555.123.4567\n"
+            "Existing,900-000-0000\n"
+            "Short,12345\n"
+            ",5550000000\n"
+            "Bob,555 765 4321\n"
+        )
+        self.assertIn("Created 2 players (2 duplicate phones, 2 invalid rows skipped)", out)
+        imported = Player.objects.exclude(pk=self.players[0].pk)
+        self.assertEqual(dict(imported.values_list("name", "phone")), {"Ann": "5551234567", "Bob": "5557654321"})
+        for player in imported:
+            self.assertEqual(bytes(player.board_layout), generate_layout(player.id))
+
+    def test_missing_columns(self):
+        with self.assertRaisesMessage(CommandError, "CSV must have 'name' and 'phone' columns."):
+            self.import_csv("name,email\nAnn,ann@example.com\n")
+
+    def test_render_qr(self):
+        self.import_csv("name,phone\nAnn,5551234567\nBob,5557654321\n", "--render-qr", "--workers", "1")
+        for player in Player.objects.exclude(pk=self.players[0].pk):
+            content = caches["qr"].get(qr._cache_key(player.id, "png"))
+            self.assertEqual(content, qr.render_png(player.id))
+
+
+@skipUnless(connection.vendor == "sqlite", "reads SQLite query plans")
+class ScanIndexTests(GameTestCase):
+    player_count = 2
+
+    def assertUsesIndex(self, queryset, index):
+        self.assertIn(index, queryset.explain())
+
+    def test_hot_lookups_use_indexes(self):
+        scanner, target = self.players
+        duplicate_target = ScanRecord.objects.filter(scanner=scanner, target=target).order_by()
+        self.assertUsesIndex(duplicate_target, "INDEX scan_scanner_target_task_idx (scanner_id=? AND target_id=?)")
+        pairs = ScanRecord.objects.filter(scanner=scanner).order_by().values_list("target_id", "task_id")
+        self.assertUsesIndex(pairs, "COVERING INDEX scan_scanner_target_task_idx")
+        pending = ScanRecord.objects.filter(game=self.game, verification_status="pending")
+        changelist = pending.order_by("-timestamp")[:100]
+        self.assertUsesIndex(changelist, "INDEX scan_game_status_time_idx")
+        self.assertNotIn("TEMP B-TREE", changelist.explain())
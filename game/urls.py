@@ -1,14 +1,31 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import include, path
 
-from . import views
+from . import async_views, views
 
-urlpatterns = [
+# The hot endpoints have async versions for ASGI deployments
+hot_views = async_views if settings.ASYNC_VIEWS else views
+
+# Routes scoped to one game; served unprefixed for the default game and under
+# games/<slug>/ for every game
+game_urlpatterns = [
     path("register/", views.register_player, name="register"),
     path("player/<uuid:player_id>/", views.get_player, name="get-player"),
-    path("board/<uuid:player_id>/", views.get_board, name="get-board"),
-    path("scan/", views.submit_scan, name="submit-scan"),
-    path("game-state/", views.get_game_state, name="game-state"),
-    path("winners/", views.get_winners, name="winners"),
+    path("player/<uuid:player_id>/qr.<str:fmt>", views.get_player_qr, name="player-qr"),
+    path("player/<uuid:player_id>/bootstrap/", views.get_player_bootstrap, name="player-bootstrap"),
+    path("board/<uuid:player_id>/", hot_views.get_board, name="get-board"),
+    path("scan/", hot_views.submit_scan, name="submit-scan"),
+    path("scan/batch/", views.submit_scan_batch, name="submit-scan-batch"),
+    path("game-state/", hot_views.get_game_state, name="game-state"),
+    path("winners/", hot_views.get_winners, name="winners"),
+    path("leaderboard/", views.get_leaderboard, name="leaderboard"),
     path("tasks/", views.get_tasks, name="tasks"),
     path("player/<uuid:player_id>/scans/", views.get_player_scans, name="player-scans"),
 ]
+
+urlpatterns = [
+    *game_urlpatterns,
+    path("games/<slug:game_slug>/", include(game_urlpatterns)),
+    path("metrics/", views.get_metrics, name="metrics"),
+    path("export/<str:name>/", views.export_data, name="export"),
+]
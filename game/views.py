@@ -1,174 +1,317 @@
-import base64
-import io
-import os
-import random
-
-import qrcode
-from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.utils import timezone
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
-from .models import GameState, Player, ScanRecord, Task, Winner
+from . import exports, idempotency, leaderboard, qr, scan_queue
+from .board import (
+    LINES_TO_WIN,
+    cell_bit,
+    count_cells,
+    count_lines,
+    get_layout,
+)
+from .catalog import build_board, build_compact_board, get_catalog, get_catalog_version
+from .metrics import registry
+from .routers import pin_to_primary, read_db, reads_from_replica
+from .models import DEFAULT_GAME_SLUG, GameState, Player, ScanRecord, Winner
 from .serializers import (
-    BoardCellSerializer,
     GameStateSerializer,
     PlayerRegistrationSerializer,
     PlayerSerializer,
+    ScanBatchSubmitSerializer,
     ScanRecordSerializer,
     ScanSubmitSerializer,
+    TaskSerializer,
     WinnerSerializer,
 )
 
 
-def _generate_qr_dataurl(player_id):
-    """Generate a QR code as a data URL (no file storage)."""
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=2,
-    )
-    qr.add_data(str(player_id))
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color="black", back_color="white")
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-
-    # Convert to base64 data URL
-    img_base64 = base64.b64encode(buf.getvalue()).decode()
-    return f"data:image/png;base64,{img_base64}"
-
-
-LINES_TO_WIN = 5
-
+def _get_game(game_slug):
+    """Return the game a request is routed to, from cache."""
+    try:
+        return GameState.get_cached(game_slug)
+    except GameState.DoesNotExist:
+        raise Http404("Game not found")
 
-def _get_shuffle_map(player_id):
-    """Return a mapping of original task position -> shuffled display position for a player.
 
-    Each player gets a unique but deterministic layout seeded by their UUID.
-    """
-    rng = random.Random(str(player_id))
-    positions = list(range(25))
-    rng.shuffle(positions)
-    # positions[i] = the original DB position of the task shown at display slot i
-    # We need the inverse: original_pos -> display_pos
-    return {orig: display for display, orig in enumerate(positions)}
-
-
-def _count_completed_lines(player):
-    """Count how many lines (rows, columns, diagonals) a player has completed."""
-    completed_db_positions = set(
-        ScanRecord.objects.filter(scanner=player).values_list("task__position", flat=True)
-    )
+def _game_reverse(name, game, **kwargs):
+    """Reverse a per-game route; the default game keeps the unprefixed URLs."""
+    if game.slug != DEFAULT_GAME_SLUG:
+        kwargs["game_slug"] = game.slug
+    return reverse(name, kwargs=kwargs)
 
-    # Map completed DB positions to shuffled display positions
-    shuffle_map = _get_shuffle_map(player.id)
-    completed_positions = {shuffle_map[pos] for pos in completed_db_positions if pos in shuffle_map}
 
-    count = 0
+def _qr_url(request, game, player_id):
+    return request.build_absolute_uri(_game_reverse("player-qr", game, player_id=player_id, fmt="png"))
 
-    # Check all 5 rows
-    for row in range(5):
-        row_positions = set(range(row * 5, row * 5 + 5))
-        if row_positions.issubset(completed_positions):
-            count += 1
 
-    # Check all 5 columns
-    for col in range(5):
-        col_positions = {col + row * 5 for row in range(5)}
-        if col_positions.issubset(completed_positions):
-            count += 1
+def _conditional_response(request, etag=None, last_modified=None):
+    """Return a 304 response if the request's validators match, otherwise None."""
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
 
-    # Check both diagonals
-    if {0, 6, 12, 18, 24}.issubset(completed_positions):
-        count += 1
-    if {4, 8, 12, 16, 20}.issubset(completed_positions):
-        count += 1
 
-    return count
+def _set_validators(response, etag=None, last_modified=None):
+    """Attach validators and make clients revalidate before reusing the response."""
+    if etag is not None:
+        response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, no_cache=True)
+    return response
 
 
 @api_view(["POST"])
-def register_player(request):
+def register_player(request, game_slug=DEFAULT_GAME_SLUG):
     """Register a new player and generate their QR code."""
+    game = _get_game(game_slug)
     serializer = PlayerRegistrationSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
     # Check for existing player with same phone
     phone = serializer.validated_data["phone"]
-    existing = Player.objects.filter(phone=phone).first()
+    existing = Player.objects.filter(game=game, phone=phone).first()
     if existing:
         response_data = PlayerSerializer(existing, context={"request": request}).data
-        # Generate fresh QR code data URL for existing player
-        response_data["qr_code_url"] = _generate_qr_dataurl(existing.id)
+        response_data["qr_code_url"] = qr.get_qr_dataurl(existing.id)
         return Response(response_data, status=status.HTTP_200_OK)
 
-    player = serializer.save()
+    player = serializer.save(game=game)
+    # The client fetches the new player's bootstrap next
+    pin_to_primary(player.id)
     response_data = PlayerSerializer(player, context={"request": request}).data
-    # Generate QR code data URL (no file storage)
-    response_data["qr_code_url"] = _generate_qr_dataurl(player.id)
+    # Inline the QR code so the signup screen can show it without another request
+    response_data["qr_code_url"] = qr.get_qr_dataurl(player.id)
     return Response(response_data, status=status.HTTP_201_CREATED)
 
 
+@reads_from_replica
 @api_view(["GET"])
-def get_player(request, player_id):
+def get_player(request, player_id, game_slug=DEFAULT_GAME_SLUG):
     """Get player details by ID."""
+    game = _get_game(game_slug)
     try:
-        player = Player.objects.get(id=player_id)
+        player = Player.objects.get(id=player_id, game=game)
     except Player.DoesNotExist:
         return Response({"error": "Player not found"}, status=status.HTTP_404_NOT_FOUND)
 
     response_data = PlayerSerializer(player, context={"request": request}).data
-    # Generate QR code data URL on-the-fly
-    response_data["qr_code_url"] = _generate_qr_dataurl(player.id)
+    # Point at the cacheable image endpoint instead of inlining base64
+    response_data["qr_code_url"] = _qr_url(request, game, player.id)
     return Response(response_data)
 
 
+@reads_from_replica
 @api_view(["GET"])
-def get_board(request, player_id):
-    """Get the bingo board for a player with completion status."""
+def get_player_bootstrap(request, player_id, game_slug=DEFAULT_GAME_SLUG):
+    """Get everything the board page needs for a player in one request.
+
+    Pass ``?qr=1`` to include the player's QR code URL.
+    """
+    game = _get_game(game_slug)
     try:
-        player = Player.objects.get(id=player_id)
+        player = Player.objects.get(id=player_id, game=game)
     except Player.DoesNotExist:
         return Response({"error": "Player not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    tasks = Task.objects.all()
-    completed_task_ids = set(
-        ScanRecord.objects.filter(scanner=player).values_list("task_id", flat=True)
+    player_data = PlayerSerializer(player, context={"request": request}).data
+    if request.query_params.get("qr") in ("1", "true"):
+        player_data["qr_code_url"] = _qr_url(request, game, player.id)
+    else:
+        del player_data["qr_code_url"]
+
+    mask = player.completed_mask
+    return Response(
+        {
+            "player": player_data,
+            "board": build_board(get_layout(player), mask, get_catalog(game.pk)),
+            "completed_count": count_cells(mask),
+            "completed_lines": count_lines(mask),
+            "lines_to_win": LINES_TO_WIN,
+            "game_state": GameStateSerializer(game).data,
+        }
     )
 
-    shuffle_map = _get_shuffle_map(player.id)
-
-    cells = []
-    for task in tasks:
-        cells.append(
-            {
-                "task_id": task.id,
-                "description": task.description,
-                "position": shuffle_map.get(task.position, task.position),
-                "completed": task.id in completed_task_ids,
-            }
-        )
 
-    serializer = BoardCellSerializer(cells, many=True)
-    return Response(serializer.data)
+@reads_from_replica
+@require_GET
+def get_player_qr(request, player_id, fmt, game_slug=DEFAULT_GAME_SLUG):
+    """Serve a player's QR code as a cacheable PNG or SVG image."""
+    game = _get_game(game_slug)
+    if fmt not in qr.CONTENT_TYPES or not Player.objects.filter(id=player_id, game=game).exists():
+        raise Http404("Player not found")
+
+    image = qr.get_qr(player_id, fmt)
+    response = get_conditional_response(request, etag=image.etag)
+    if response is None:
+        response = HttpResponse(image.content, content_type=image.content_type)
+    response["ETag"] = image.etag
+    # The image for a given player never changes
+    patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    return response
+
+
+@reads_from_replica
+@api_view(["GET"])
+def get_board(request, player_id, game_slug=DEFAULT_GAME_SLUG):
+    """Get the bingo board for a player with completion status.
+
+    ``?format=compact`` returns task ids in display order and a completion bitmask instead.
+    """
+    game = _get_game(game_slug)
+    try:
+        player = Player.objects.get(id=player_id, game=game)
+    except Player.DoesNotExist:
+        return Response({"error": "Player not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    # The board only changes when the player's progress or the task catalog does
+    catalog = get_catalog(game.pk)
+    compact = request.query_params.get("format") == "compact"
+    etag = f'"{player.completed_mask:x}-{catalog.version}{"-c" if compact else ""}"'
+    response = _conditional_response(request, etag=etag)
+    if response is None:
+        board = build_compact_board if compact else build_board
+        response = Response(board(get_layout(player), player.completed_mask, catalog))
+    return _set_validators(response, etag=etag)
+
+
+def _progress_fields(mask):
+    """Return the Player columns derived from a completion mask."""
+    return {
+        "completed_mask": mask,
+        "cells_completed": count_cells(mask),
+        "lines_completed": count_lines(mask),
+    }
+
+
+def _mark_cell(player, bit):
+    """Set a completion bit on a player's stored mask and return the mask before it.
+
+    Updates ``player.completed_mask`` to the stored value afterwards, and
+    keeps the leaderboard scores in step with it. The conditional update
+    succeeds unless another scan by the same player committed in between, in
+    which case the bit is OR-ed in atomically, the mask re-read and the scores
+    recomputed from it.
+    """
+    previous = player.completed_mask
+    now = timezone.now()
+    updated = Player.objects.filter(pk=player.pk, completed_mask=previous).update(
+        **_progress_fields(previous | bit), last_progress_at=now
+    )
+    if updated:
+        player.completed_mask = previous | bit
+        return previous
+
+    # The OR-update locks the row until commit, so the re-read mask stays current
+    Player.objects.filter(pk=player.pk).update(
+        completed_mask=F("completed_mask").bitor(bit), last_progress_at=now
+    )
+    mask = Player.objects.values_list("completed_mask", flat=True).get(pk=player.pk)
+    Player.objects.filter(pk=player.pk).update(**_progress_fields(mask))
+    player.completed_mask = mask
+    return mask & ~bit
+
+
+def _claim_winner_slot(player, game):
+    """Record a player as a winner if a slot is still open.
+
+    Must run inside a transaction. Locks the game state row so concurrent
+    winners are admitted one at a time against its ``winner_count`` and the
+    game ends exactly at ``max_winners``. Returns ``(new_win, game)``.
+    """
+    game = GameState.objects.select_for_update().get(pk=game.pk)
+    if not game.game_active or Winner.objects.filter(player=player).exists():
+        return False, game
+
+    new_win = game.winner_count < game.max_winners
+    if new_win:
+        Winner.objects.create(game=game, player=player, win_type="bingo")
+        game.winner_count += 1
+
+    # Check if game should end
+    if game.winner_count >= game.max_winners:
+        game.game_active = False
+    game.save(update_fields=["winner_count", "game_active"])
+    return new_win, game
+
+
+def _record_scan(scanner, target, task, game):
+    """Save a validated scan, mark the scanner's cell and check for a win.
+
+    Returns the ``submit_scan`` response body. Raises ``IntegrityError`` if
+    the scanner already completed the task.
+    """
+    with transaction.atomic():
+        # unique_together (scanner, task) rejects a repeated task
+        scan = ScanRecord.objects.create(game=game, scanner=scanner, target=target, task=task)
+        previous_mask = _mark_cell(scanner, cell_bit(get_layout(scanner), task.position))
+
+        # Check for win (player needs 5 completed lines)
+        completed_lines = count_lines(scanner.completed_mask)
+        new_win = False
+        if count_lines(previous_mask) < LINES_TO_WIN <= completed_lines:
+            new_win, game = _claim_winner_slot(scanner, game)
+    pin_to_primary(scanner.id)
+    scan_queue.forget(scanner.id)
+
+    return {
+        "scan": ScanRecordSerializer(scan).data,
+        "completed_lines": completed_lines,
+        "lines_to_win": LINES_TO_WIN,
+        "new_win": new_win,
+        "game_active": game.game_active,
+    }
 
 
 @api_view(["POST"])
-def submit_scan(request):
-    """Submit a QR scan to complete a task."""
+def submit_scan(request, game_slug=DEFAULT_GAME_SLUG):
+    """Submit a QR scan to complete a task.
+
+    A retry sent with the same ``Idempotency-Key`` header as an earlier
+    request gets that request's response back, without touching the game.
+    """
     serializer = ScanSubmitSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    key = request.headers.get(idempotency.HEADER)
+    if not key:
+        return _submit_scan(data, game_slug)
+
+    scope = data["scanner_id"]
+    fingerprint = idempotency.fingerprint({**data, "game": game_slug})
+    replay = idempotency.claim(scope, key, fingerprint)
+    if replay is not None:
+        body, code = replay
+        return Response(body, status=code)
+    try:
+        response = _submit_scan(data, game_slug)
+    except BaseException:
+        idempotency.release(scope, key)
+        raise
+    idempotency.store(scope, key, fingerprint, response.data, response.status_code)
+    return response
 
-    scanner_id = serializer.validated_data["scanner_id"]
-    target_id = serializer.validated_data["target_id"]
-    task_id = serializer.validated_data["task_id"]
 
-    # Check game is active
-    game = GameState.get_instance()
+def _submit_scan(data, game_slug):
+    scanner_id = data["scanner_id"]
+    target_id = data["target_id"]
+    task_id = data["task_id"]
+
+    # Check game is active (served from cache, so the post-game rush skips the DB)
+    game = _get_game(game_slug)
     if not game.game_active:
         return Response(
             {"error": "Game has ended"}, status=status.HTTP_403_FORBIDDEN
@@ -181,21 +324,27 @@ def submit_scan(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    # Validate players exist
-    try:
-        scanner = Player.objects.get(id=scanner_id)
-    except Player.DoesNotExist:
-        return Response({"error": "Scanner not found"}, status=status.HTTP_404_NOT_FOUND)
+    if settings.SCAN_INGESTION == "queued":
+        body, code = scan_queue.submit(game, scanner_id, target_id, task_id)
+        return Response(body, status=code)
 
-    try:
-        target = Player.objects.get(id=target_id)
-    except Player.DoesNotExist:
+    # Validate both players with a single query
+    players = {
+        p.id: p
+        for p in Player.objects.filter(id__in=[scanner_id, target_id], game=game).only(
+            "id", "name", "completed_mask", "board_layout"
+        )
+    }
+    scanner = players.get(scanner_id)
+    if scanner is None:
+        return Response({"error": "Scanner not found"}, status=status.HTTP_404_NOT_FOUND)
+    target = players.get(target_id)
+    if target is None:
         return Response({"error": "Target player not found"}, status=status.HTTP_404_NOT_FOUND)
 
     # Validate task exists
-    try:
-        task = Task.objects.get(id=task_id)
-    except Task.DoesNotExist:
+    task = get_catalog(game.pk).by_id.get(task_id)
+    if task is None:
         return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
 
     # Prevent scanning the same person more than once (unless allowed)
@@ -206,75 +355,233 @@ def submit_scan(request):
                 status=status.HTTP_409_CONFLICT,
             )
 
-    # Prevent duplicate scan for same task
-    if ScanRecord.objects.filter(scanner=scanner, task=task).exists():
+    try:
+        result = _record_scan(scanner, target, task, game)
+    except IntegrityError:
         return Response(
             {"error": "You already completed this task"},
             status=status.HTTP_409_CONFLICT,
         )
+    return Response(result, status=status.HTTP_201_CREATED)
 
-    # Create scan record
-    scan = ScanRecord.objects.create(scanner=scanner, target=target, task=task)
 
-    # Check for win (player needs 5 completed lines)
-    completed_lines = _count_completed_lines(scanner)
-    is_winner = completed_lines >= LINES_TO_WIN
-    new_win = False
+@api_view(["POST"])
+def submit_scan_batch(request, game_slug=DEFAULT_GAME_SLUG):
+    """Submit an ordered list of scans for one scanner, e.g. queued while offline.
 
-    if is_winner and not Winner.objects.filter(player=scanner).exists():
-        Winner.objects.create(player=scanner, win_type="bingo")
-        new_win = True
+    Each item gets its own result with the status and error ``submit_scan``
+    would have returned for it; accepted scans are inserted together and the
+    win check runs once at the end. With queued ingestion the items go
+    through the journal one by one instead.
+    """
+    serializer = ScanBatchSubmitSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
 
-    # Check if game should end
-    total_winners = Winner.objects.values("player").distinct().count()
-    if total_winners >= game.max_winners:
-        game.game_active = False
-        game.save()
+    scanner_id = serializer.validated_data["scanner_id"]
+    items = serializer.validated_data["scans"]
+
+    game = _get_game(game_slug)
+    if not game.game_active:
+        return Response(
+            {"error": "Game has ended"}, status=status.HTTP_403_FORBIDDEN
+        )
+    if settings.SCAN_INGESTION == "queued":
+        body, code = scan_queue.submit_batch(game, scanner_id, items)
+        return Response(body, status=code)
+
+    # Prefetch the scanner and every target with a single query
+    target_ids = {item["target_id"] for item in items}
+    players = {
+        p.id: p
+        for p in Player.objects.filter(id__in=target_ids | {scanner_id}, game=game).only(
+            "id", "name", "completed_mask", "board_layout"
+        )
+    }
+    scanner = players.get(scanner_id)
+    if scanner is None:
+        return Response({"error": "Scanner not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    done_tasks = set()
+    done_targets = set()
+    for target_id, task_id in ScanRecord.objects.filter(scanner=scanner).order_by().values_list(
+        "target_id", "task_id"
+    ):
+        done_targets.add(target_id)
+        done_tasks.add(task_id)
+
+    tasks = get_catalog(game.pk).by_id
+    layout = get_layout(scanner)
+    results = []
+    pending = []
+    bits = 0
+    for item in items:
+        target = players.get(item["target_id"])
+        task = tasks.get(item["task_id"])
+        if item["target_id"] == scanner_id:
+            error, code = "You cannot scan your own QR code", status.HTTP_400_BAD_REQUEST
+        elif target is None:
+            error, code = "Target player not found", status.HTTP_404_NOT_FOUND
+        elif task is None:
+            error, code = "Task not found", status.HTTP_404_NOT_FOUND
+        elif not game.allow_duplicate_scans and target.id in done_targets:
+            error, code = "You already scanned this person", status.HTTP_409_CONFLICT
+        elif task.id in done_tasks:
+            error, code = "You already completed this task", status.HTTP_409_CONFLICT
+        else:
+            done_targets.add(target.id)
+            done_tasks.add(task.id)
+            bits |= cell_bit(layout, task.position)
+            pending.append(ScanRecord(game=game, scanner=scanner, target=target, task=task))
+            results.append({"status": status.HTTP_201_CREATED})
+            continue
+        results.append({"status": code, "error": error})
+
+    new_win = False
+    try:
+        with transaction.atomic():
+            scans = iter(ScanRecord.objects.bulk_create(pending))
+            previous_mask = _mark_cell(scanner, bits) if bits else scanner.completed_mask
+            completed_lines = count_lines(scanner.completed_mask)
+            if count_lines(previous_mask) < LINES_TO_WIN <= completed_lines:
+                new_win, game = _claim_winner_slot(scanner, game)
+    except IntegrityError:
+        # A scan for one of these tasks landed concurrently; a retry will
+        # report it per item
+        return Response(
+            {"error": "Scans changed while submitting, please retry"},
+            status=status.HTTP_409_CONFLICT,
+        )
+    if pending:
+        pin_to_primary(scanner.id)
+        scan_queue.forget(scanner.id)
+
+    for result in results:
+        if result["status"] == status.HTTP_201_CREATED:
+            result["scan"] = ScanRecordSerializer(next(scans)).data
 
     return Response(
         {
-            "scan": ScanRecordSerializer(scan).data,
+            "results": results,
             "completed_lines": completed_lines,
             "lines_to_win": LINES_TO_WIN,
             "new_win": new_win,
             "game_active": game.game_active,
-        },
-        status=status.HTTP_201_CREATED,
+        }
     )
 
 
+@reads_from_replica
 @api_view(["GET"])
-def get_game_state(request):
+def get_game_state(request, game_slug=DEFAULT_GAME_SLUG):
     """Get the current game state."""
-    game = GameState.get_instance()
-    serializer = GameStateSerializer(game)
-    return Response(serializer.data)
+    game = _get_game(game_slug)
+    # Every change, including a new winner, bumps the version
+    etag = f'"{game.version}"'
+    response = _conditional_response(request, etag=etag)
+    if response is None:
+        response = Response(GameStateSerializer(game).data)
+    return _set_validators(response, etag=etag)
 
 
+@reads_from_replica
 @api_view(["GET"])
-def get_winners(request):
+def get_winners(request, game_slug=DEFAULT_GAME_SLUG):
     """Get the list of winners."""
-    winners = Winner.objects.select_related("player").all()
-    serializer = WinnerSerializer(winners, many=True)
-    return Response(serializer.data)
+    game = _get_game(game_slug)
+    summary = Winner.objects.filter(game=game).order_by().aggregate(
+        count=Count("id"), last_won_at=Max("won_at")
+    )
+    last_modified = summary["last_won_at"]
+    etag = f'"{summary["count"]}-{last_modified.timestamp() if last_modified else 0}"'
 
+    response = _conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        winners = Winner.objects.filter(game=game).select_related("player")
+        response = Response(WinnerSerializer(winners, many=True).data)
+    return _set_validators(response, etag=etag, last_modified=last_modified)
 
+
+@reads_from_replica
 @api_view(["GET"])
-def get_tasks(request):
-    """Get all tasks."""
-    tasks = Task.objects.all()
-    from .serializers import TaskSerializer
+def get_leaderboard(request, game_slug=DEFAULT_GAME_SLUG):
+    """Get the top players by completed lines, then cells, then who got there first.
+
+    ``?limit=`` sets how many players to return (default 20).
+    """
+    try:
+        limit = int(request.query_params.get("limit", 20))
+    except ValueError:
+        return Response({"error": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, settings.LEADERBOARD_MAX_SIZE))
+
+    board = leaderboard.get_leaderboard(_get_game(game_slug).pk, limit)
+    response = _conditional_response(request, etag=board.etag)
+    if response is None:
+        response = Response({"players": board.entries, "lines_to_win": LINES_TO_WIN})
+    return _set_validators(response, etag=board.etag)
 
-    return Response(TaskSerializer(tasks, many=True).data)
+
+@reads_from_replica
+@api_view(["GET"])
+def get_tasks(request, game_slug=DEFAULT_GAME_SLUG):
+    """Get all tasks."""
+    game = _get_game(game_slug)
+    etag = f'"{get_catalog_version()}"'
+    response = _conditional_response(request, etag=etag)
+    if response is None:
+        response = Response(TaskSerializer(get_catalog(game.pk).tasks, many=True).data)
+    return _set_validators(response, etag=etag)
 
 
+@reads_from_replica
 @api_view(["GET"])
-def get_player_scans(request, player_id):
+def get_player_scans(request, player_id, game_slug=DEFAULT_GAME_SLUG):
     """Get all scans made by a specific player."""
+    game = _get_game(game_slug)
     try:
-        player = Player.objects.get(id=player_id)
+        player = Player.objects.get(id=player_id, game=game)
     except Player.DoesNotExist:
         return Response({"error": "Player not found"}, status=status.HTTP_404_NOT_FOUND)
 
     scans = ScanRecord.objects.filter(scanner=player).select_related("target", "task")
     return Response(ScanRecordSerializer(scans, many=True).data)
+
+
+@require_GET
+def get_metrics(request):
+    """Expose per-view request metrics in Prometheus text format.
+
+    Available to staff users, or to scrapers sending ``METRICS_TOKEN`` as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    is_staff = request.user.is_active and request.user.is_staff
+    if not is_staff and not (
+        token and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4")
+
+
+@require_GET
+def export_data(request, name):
+    """Stream every scan, winner or player to staff users as a CSV download.
+
+    Pass ``?format=ndjson`` for newline-delimited JSON and ``?gzip=1`` to compress.
+    """
+    if not (request.user.is_active and request.user.is_staff):
+        return HttpResponseForbidden()
+    fmt = request.GET.get("format", "csv")
+    if name not in exports.EXPORTS or fmt not in exports.CONTENT_TYPES:
+        raise Http404("Unknown export")
+    compress = request.GET.get("gzip") in ("1", "true")
+
+    # Django buffers a sync iterator in full before serving it over ASGI
+    stream = exports.aiter_export if isinstance(request, ASGIRequest) else exports.iter_export
+    response = StreamingHttpResponse(
+        stream(name, fmt, compress, using=read_db()),
+        content_type="application/gzip" if compress else exports.CONTENT_TYPES[fmt],
+    )
+    filename = f"bingo-{name}-{timezone.now():%Y%m%d-%H%M%S}.{fmt}{'.gz' if compress else ''}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    patch_cache_control(response, private=True, no_store=True)
+    return response